@@ -0,0 +1,159 @@
+"""Log row count deltas with the table changes
+
+Revision ID: 2d7f9b3e8c51
+Revises: 8e5b2c6d1f94
+Create Date: 2026-10-18 21:48:15.730442
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d7f9b3e8c51'
+down_revision: Union[str, None] = '8e5b2c6d1f94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTED_TABLES = ('authors', 'books')
+
+
+def upgrade() -> None:
+    # The row counts still lived on the table_versions row, so every insert and delete kept
+    # updating it and concurrent writers queued on its lock. The change log rows now carry
+    # the statement's row delta, folded into table_versions.row_count with the version.
+    op.add_column('table_changes', sa.Column('row_delta', sa.BigInteger(), server_default='0', nullable=False))
+
+    for table in COUNTED_TABLES:
+        for event in ('truncate', 'delete', 'insert'):
+            op.execute(f"DROP TRIGGER {table}_row_count_{event} ON {table}")
+        op.execute(f"DROP TRIGGER {table}_log_change ON {table}")
+    op.execute("DROP FUNCTION count_table_rows()")
+
+    # TRUNCATE holds an exclusive lock on the table, so no other writer's change to it is
+    # pending, and the table's current count is exactly what it removes.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION log_table_change() RETURNS trigger AS $$
+        DECLARE
+            delta bigint := 0;
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                SELECT count(*) INTO delta FROM new_rows;
+            ELSIF TG_OP = 'DELETE' THEN
+                SELECT -count(*) INTO delta FROM old_rows;
+            ELSIF TG_OP = 'TRUNCATE' THEN
+                SELECT -(row_count + (SELECT coalesce(sum(row_delta), 0) FROM table_changes
+                                      WHERE table_name = TG_TABLE_NAME))
+                INTO delta FROM table_versions WHERE table_name = TG_TABLE_NAME;
+            END IF;
+            INSERT INTO table_changes (table_name, row_delta) VALUES (TG_TABLE_NAME, delta);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # Transition tables need one trigger per event.
+    for table in COUNTED_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_log_insert AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION log_table_change()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_log_delete AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION log_table_change()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_log_change AFTER UPDATE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION log_table_change()
+        """)
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION compact_table_changes() RETURNS void AS $$
+        BEGIN
+            IF NOT pg_try_advisory_xact_lock(hashtext('compact_table_changes')) THEN
+                RETURN;
+            END IF;
+            WITH moved AS (
+                DELETE FROM table_changes RETURNING table_name, row_delta
+            )
+            UPDATE table_versions
+            SET version = version + changes.statements, row_count = row_count + changes.row_delta
+            FROM (
+                SELECT table_name, count(*) AS statements, sum(row_delta) AS row_delta FROM moved GROUP BY table_name
+            ) AS changes
+            WHERE table_versions.table_name = changes.table_name;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    op.execute("SELECT compact_table_changes()")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION compact_table_changes() RETURNS void AS $$
+        BEGIN
+            IF NOT pg_try_advisory_xact_lock(hashtext('compact_table_changes')) THEN
+                RETURN;
+            END IF;
+            WITH moved AS (
+                DELETE FROM table_changes RETURNING table_name
+            )
+            UPDATE table_versions SET version = version + changes.statements
+            FROM (SELECT table_name, count(*) AS statements FROM moved GROUP BY table_name) AS changes
+            WHERE table_versions.table_name = changes.table_name;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    for table in COUNTED_TABLES:
+        for trigger in ('log_change', 'log_delete', 'log_insert'):
+            op.execute(f"DROP TRIGGER {table}_{trigger} ON {table}")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION log_table_change() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO table_changes (table_name) VALUES (TG_TABLE_NAME);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE FUNCTION count_table_rows() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE table_versions SET row_count = row_count + (SELECT count(*) FROM new_rows)
+                WHERE table_name = TG_TABLE_NAME;
+            ELSIF TG_OP = 'DELETE' THEN
+                UPDATE table_versions SET row_count = row_count - (SELECT count(*) FROM old_rows)
+                WHERE table_name = TG_TABLE_NAME;
+            ELSE
+                UPDATE table_versions SET row_count = 0 WHERE table_name = TG_TABLE_NAME;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in COUNTED_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_log_change
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION log_table_change()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_row_count_insert AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION count_table_rows()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_row_count_delete AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION count_table_rows()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_row_count_truncate AFTER TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION count_table_rows()
+        """)
+
+    op.drop_column('table_changes', 'row_delta')
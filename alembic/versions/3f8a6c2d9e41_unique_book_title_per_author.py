@@ -0,0 +1,29 @@
+"""Unique book title per author
+
+Revision ID: 3f8a6c2d9e41
+Revises: 9d4e2b7c1a6f
+Create Date: 2026-10-18 16:41:09.215530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f8a6c2d9e41'
+down_revision: Union[str, None] = '9d4e2b7c1a6f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The constraint's index replaces the plain (title, author_id) index for lookups too.
+    op.drop_index('ix_books_title_author_id', table_name='books')
+    op.create_unique_constraint('uq_books_title_author_id', 'books', ['title', 'author_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_books_title_author_id', 'books', type_='unique')
+    op.create_index('ix_books_title_author_id', 'books', ['title', 'author_id'], unique=False)
@@ -0,0 +1,44 @@
+"""Unique book title
+
+Revision ID: 4c9e1a7f3b62
+Revises: 7b2f4d9e6a15
+Create Date: 2026-10-18 20:17:52.803164
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4c9e1a7f3b62'
+down_revision: Union[str, None] = '7b2f4d9e6a15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The API refuses a title any book already has, so the schema enforces the same rule and
+    # creates, updates, bulk writes and imports all get it from the database. Which of the
+    # books sharing a title to keep, rename or merge is the catalogue owner's call, so the
+    # migration stops until they have been deduplicated rather than changing data itself.
+    duplicates = op.get_bind().execute(sa.text("""
+        SELECT title, count(*) AS books FROM books GROUP BY title HAVING count(*) > 1 ORDER BY title
+    """)).all()
+    if duplicates:
+        listed = "\n".join(f"  {title!r}: {books} books" for title, books in duplicates[:20])
+        more = f"\n  ... and {len(duplicates) - 20} more" if len(duplicates) > 20 else ""
+        raise RuntimeError(
+            f"{len(duplicates)} titles are held by more than one book, so they can't be made unique:\n"
+            f"{listed}{more}\n"
+            "Rename, merge or delete the duplicates (SELECT title FROM books GROUP BY title HAVING count(*) > 1 "
+            "lists them all), then run the upgrade again."
+        )
+    op.drop_constraint('uq_books_title_author_id', 'books', type_='unique')
+    op.create_unique_constraint('uq_books_title', 'books', ['title'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_books_title', 'books', type_='unique')
+    op.create_unique_constraint('uq_books_title_author_id', 'books', ['title', 'author_id'])
@@ -0,0 +1,42 @@
+"""Add book and author indexes
+
+Revision ID: 5c1f0e9a7b3d
+Revises: 07a807e8d00b
+Create Date: 2026-10-18 09:12:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1f0e9a7b3d'
+down_revision: Union[str, None] = '07a807e8d00b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(op.f('ix_books_author_id'), 'books', ['author_id'], unique=False)
+    op.create_index(op.f('ix_books_published_year'), 'books', ['published_year'], unique=False)
+    op.create_index(op.f('ix_books_genre'), 'books', ['genre'], unique=False)
+    op.create_index('ix_books_title_author_id', 'books', ['title', 'author_id'], unique=False)
+    op.create_index('ix_books_title_trgm', 'books', ['title'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+    op.create_index('ix_books_genre_trgm', 'books', ['genre'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'genre': 'gin_trgm_ops'})
+    op.create_index('ix_authors_name_trgm', 'authors', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_authors_name_trgm', table_name='authors')
+    op.drop_index('ix_books_genre_trgm', table_name='books')
+    op.drop_index('ix_books_title_trgm', table_name='books')
+    op.drop_index('ix_books_title_author_id', table_name='books')
+    op.drop_index(op.f('ix_books_genre'), table_name='books')
+    op.drop_index(op.f('ix_books_published_year'), table_name='books')
+    op.drop_index(op.f('ix_books_author_id'), table_name='books')
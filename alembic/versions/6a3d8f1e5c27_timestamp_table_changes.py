@@ -0,0 +1,73 @@
+"""Timestamp the table changes for Last-Modified
+
+Revision ID: 6a3d8f1e5c27
+Revises: 2d7f9b3e8c51
+Create Date: 2026-10-19 09:12:44.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '6a3d8f1e5c27'
+down_revision: Union[str, None] = '2d7f9b3e8c51'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Each change row records when its statement ran, and the compactor keeps the latest of
+    # those on table_versions, so a table's Last-Modified is the later of the two like its
+    # version. clock_timestamp() rather than now(), so a long transaction's later statements
+    # aren't dated from its start.
+    op.add_column('table_changes', sa.Column('changed_at', sa.DateTime(timezone=True),
+                                             server_default=sa.text('clock_timestamp()'), nullable=False))
+    op.add_column('table_versions', sa.Column('updated_at', sa.DateTime(timezone=True),
+                                              server_default=sa.text('now()'), nullable=False))
+
+    op.execute("""
+        CREATE OR REPLACE FUNCTION compact_table_changes() RETURNS void AS $$
+        BEGIN
+            IF NOT pg_try_advisory_xact_lock(hashtext('compact_table_changes')) THEN
+                RETURN;
+            END IF;
+            WITH moved AS (
+                DELETE FROM table_changes RETURNING table_name, row_delta, changed_at
+            )
+            UPDATE table_versions
+            SET version = version + changes.statements, row_count = row_count + changes.row_delta,
+                updated_at = greatest(updated_at, changes.changed_at)
+            FROM (
+                SELECT table_name, count(*) AS statements, sum(row_delta) AS row_delta, max(changed_at) AS changed_at
+                FROM moved GROUP BY table_name
+            ) AS changes
+            WHERE table_versions.table_name = changes.table_name;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION compact_table_changes() RETURNS void AS $$
+        BEGIN
+            IF NOT pg_try_advisory_xact_lock(hashtext('compact_table_changes')) THEN
+                RETURN;
+            END IF;
+            WITH moved AS (
+                DELETE FROM table_changes RETURNING table_name, row_delta
+            )
+            UPDATE table_versions
+            SET version = version + changes.statements, row_count = row_count + changes.row_delta
+            FROM (
+                SELECT table_name, count(*) AS statements, sum(row_delta) AS row_delta FROM moved GROUP BY table_name
+            ) AS changes
+            WHERE table_versions.table_name = changes.table_name;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.drop_column('table_versions', 'updated_at')
+    op.drop_column('table_changes', 'changed_at')
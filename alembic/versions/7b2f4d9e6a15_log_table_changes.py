@@ -0,0 +1,102 @@
+"""Log table changes instead of bumping a shared version row
+
+Revision ID: 7b2f4d9e6a15
+Revises: e2a9f7c4b1d3
+Create Date: 2026-10-18 19:41:08.216530
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2f4d9e6a15'
+down_revision: Union[str, None] = 'e2a9f7c4b1d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ('authors', 'books')
+
+
+def upgrade() -> None:
+    # Every write used to UPDATE the table's single table_versions row, so concurrent writers
+    # queued on its row lock until the first one committed. Writers now only append to
+    # table_changes; a table's version is its table_versions.version plus its pending rows
+    # there, which compact_table_changes() folds back in off the write path.
+    op.create_table(
+        'table_changes',
+        sa.Column('id', sa.BigInteger(), sa.Identity(always=True), nullable=False),
+        sa.Column('table_name', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_table_changes_table_name', 'table_changes', ['table_name'])
+
+    for table in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER {table}_bump_version ON {table}")
+    op.execute("DROP FUNCTION bump_table_version()")
+    op.drop_column('table_versions', 'updated_at')
+
+    op.execute("""
+        CREATE FUNCTION log_table_change() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO table_changes (table_name) VALUES (TG_TABLE_NAME);
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in VERSIONED_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_log_change
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION log_table_change()
+        """)
+
+    # The DELETE and the UPDATE commit together, so a reader sees the pending rows or the
+    # folded version, never both or neither. The advisory lock skips the run when another
+    # worker is already compacting.
+    op.execute("""
+        CREATE FUNCTION compact_table_changes() RETURNS void AS $$
+        BEGIN
+            IF NOT pg_try_advisory_xact_lock(hashtext('compact_table_changes')) THEN
+                RETURN;
+            END IF;
+            WITH moved AS (
+                DELETE FROM table_changes RETURNING table_name
+            )
+            UPDATE table_versions SET version = version + changes.statements
+            FROM (SELECT table_name, count(*) AS statements FROM moved GROUP BY table_name) AS changes
+            WHERE table_versions.table_name = changes.table_name;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    op.execute("SELECT compact_table_changes()")
+    op.execute("DROP FUNCTION compact_table_changes()")
+    for table in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER {table}_log_change ON {table}")
+    op.execute("DROP FUNCTION log_table_change()")
+
+    op.add_column('table_versions', sa.Column('updated_at', sa.DateTime(timezone=True),
+                                              server_default=sa.text('now()'), nullable=False))
+    op.execute("""
+        CREATE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE table_versions SET version = version + 1, updated_at = now()
+            WHERE table_name = TG_TABLE_NAME;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in VERSIONED_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_bump_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+        """)
+
+    op.drop_index('ix_table_changes_table_name', table_name='table_changes')
+    op.drop_table('table_changes')
@@ -0,0 +1,194 @@
+"""Log book count deltas instead of updating the count rows
+
+Revision ID: 8e5b2c6d1f94
+Revises: 4c9e1a7f3b62
+Create Date: 2026-10-18 21:02:37.551928
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e5b2c6d1f94'
+down_revision: Union[str, None] = '4c9e1a7f3b62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, group column, expression over a books row)
+DIMENSIONS = (
+    ('book_counts_by_genre', 'genre', 'genre'),
+    ('book_counts_by_author', 'author_id', 'author_id'),
+    ('book_counts_by_decade', 'decade', 'published_year / 10 * 10'),
+)
+COUNT_TABLES = ', '.join(table for table, *_ in DIMENSIONS)
+
+
+def upgrade() -> None:
+    # Upserting the count rows from the write triggers made every write touching a popular
+    # genre or decade wait on that row's lock, and each statement scanned the count tables for
+    # empty groups. Writers now append their grouped changes to book_count_deltas, readers add
+    # the pending deltas to the counts, and roll_up_book_counts() folds them in off the write path.
+    op.create_table(
+        'book_count_deltas',
+        sa.Column('id', sa.BigInteger(), sa.Identity(always=True), nullable=False),
+        sa.Column('genre', sa.String(), nullable=False),
+        sa.Column('author_id', sa.Integer(), nullable=False),
+        sa.Column('decade', sa.Integer(), nullable=False),
+        sa.Column('books', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    for trigger in ('books_count_truncate', 'books_count_delete', 'books_count_update', 'books_count_insert'):
+        op.execute(f"DROP TRIGGER {trigger} ON books")
+    op.execute("DROP FUNCTION count_books()")
+
+    op.execute("""
+        CREATE FUNCTION log_book_count_deltas() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO book_count_deltas (genre, author_id, decade, books)
+                SELECT genre, author_id, published_year / 10 * 10, count(*) FROM new_rows GROUP BY 1, 2, 3;
+            ELSIF TG_OP = 'DELETE' THEN
+                INSERT INTO book_count_deltas (genre, author_id, decade, books)
+                SELECT genre, author_id, published_year / 10 * 10, -count(*) FROM old_rows GROUP BY 1, 2, 3;
+            ELSE
+                INSERT INTO book_count_deltas (genre, author_id, decade, books)
+                SELECT genre, author_id, decade, sum(delta) FROM (
+                    SELECT genre, author_id, published_year / 10 * 10 AS decade, 1 AS delta FROM new_rows
+                    UNION ALL
+                    SELECT genre, author_id, published_year / 10 * 10, -1 FROM old_rows
+                ) AS changes
+                GROUP BY 1, 2, 3 HAVING sum(delta) <> 0;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION clear_book_counts() RETURNS trigger AS $$
+        BEGIN
+            TRUNCATE {COUNT_TABLES}, book_count_deltas;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # Transition tables need one trigger per event.
+    op.execute("""
+        CREATE TRIGGER books_count_insert AFTER INSERT ON books
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION log_book_count_deltas()
+    """)
+    op.execute("""
+        CREATE TRIGGER books_count_update AFTER UPDATE ON books
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION log_book_count_deltas()
+    """)
+    op.execute("""
+        CREATE TRIGGER books_count_delete AFTER DELETE ON books
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION log_book_count_deltas()
+    """)
+    op.execute("""
+        CREATE TRIGGER books_count_truncate AFTER TRUNCATE ON books
+        FOR EACH STATEMENT EXECUTE FUNCTION clear_book_counts()
+    """)
+
+    # Only the groups this rollup changed are checked for dropping to zero books. The advisory
+    # lock skips the run when another worker is already rolling up.
+    upserts = ",\n            ".join(f"""{column}s AS (
+                INSERT INTO {table} ({column}, books)
+                SELECT {column}, sum(books) FROM moved GROUP BY 1 HAVING sum(books) <> 0
+                ON CONFLICT ({column}) DO UPDATE SET books = {table}.books + excluded.books
+                RETURNING {column}, books
+            )""" for table, column, _ in DIMENSIONS)
+    op.execute(f"""
+        CREATE FUNCTION roll_up_book_counts() RETURNS void AS $$
+        DECLARE
+            empty_genres text[];
+            empty_author_ids integer[];
+            empty_decades integer[];
+        BEGIN
+            IF NOT pg_try_advisory_xact_lock(hashtext('roll_up_book_counts')) THEN
+                RETURN;
+            END IF;
+            WITH moved AS (
+                DELETE FROM book_count_deltas RETURNING genre, author_id, decade, books
+            ),
+            {upserts}
+            SELECT array(SELECT genre FROM genres WHERE books <= 0),
+                   array(SELECT author_id FROM author_ids WHERE books <= 0),
+                   array(SELECT decade FROM decades WHERE books <= 0)
+            INTO empty_genres, empty_author_ids, empty_decades;
+
+            DELETE FROM book_counts_by_genre WHERE genre = ANY(empty_genres) AND books <= 0;
+            DELETE FROM book_counts_by_author WHERE author_id = ANY(empty_author_ids) AND books <= 0;
+            DELETE FROM book_counts_by_decade WHERE decade = ANY(empty_decades) AND books <= 0;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    op.execute("SELECT roll_up_book_counts()")
+    op.execute("DROP FUNCTION roll_up_book_counts()")
+    for trigger in ('books_count_truncate', 'books_count_delete', 'books_count_update', 'books_count_insert'):
+        op.execute(f"DROP TRIGGER {trigger} ON books")
+    op.execute("DROP FUNCTION log_book_count_deltas()")
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION clear_book_counts() RETURNS trigger AS $$
+        BEGIN
+            TRUNCATE {COUNT_TABLES};
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+
+    dimensions = ",\n                ".join(
+        f"('{table}', '{column}', '{expression}')" for table, column, expression in DIMENSIONS
+    )
+    op.execute(f"""
+        CREATE FUNCTION count_books() RETURNS trigger AS $$
+        DECLARE
+            changes text;
+            dimension record;
+        BEGIN
+            changes := CASE TG_OP
+                WHEN 'INSERT' THEN 'SELECT *, 1 AS delta FROM new_rows'
+                WHEN 'DELETE' THEN 'SELECT *, -1 AS delta FROM old_rows'
+                ELSE 'SELECT *, 1 AS delta FROM new_rows UNION ALL SELECT *, -1 FROM old_rows'
+            END;
+            FOR dimension IN SELECT * FROM (VALUES
+                {dimensions}
+            ) AS d(table_name, column_name, expression)
+            LOOP
+                EXECUTE format(
+                    'INSERT INTO %1$I (%2$I, books)
+                     SELECT %3$s, sum(delta) FROM (%4$s) AS changes GROUP BY 1 HAVING sum(delta) <> 0
+                     ON CONFLICT (%2$I) DO UPDATE SET books = %1$I.books + excluded.books',
+                    dimension.table_name, dimension.column_name, dimension.expression, changes
+                );
+                EXECUTE format('DELETE FROM %I WHERE books <= 0', dimension.table_name);
+            END LOOP;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for event, referencing in (
+        ('insert', 'REFERENCING NEW TABLE AS new_rows'),
+        ('update', 'REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows'),
+        ('delete', 'REFERENCING OLD TABLE AS old_rows'),
+    ):
+        op.execute(f"""
+            CREATE TRIGGER books_count_{event} AFTER {event.upper()} ON books
+            {referencing}
+            FOR EACH STATEMENT EXECUTE FUNCTION count_books()
+        """)
+    op.execute("""
+        CREATE TRIGGER books_count_truncate AFTER TRUNCATE ON books
+        FOR EACH STATEMENT EXECUTE FUNCTION clear_book_counts()
+    """)
+
+    op.drop_table('book_count_deltas')
@@ -0,0 +1,54 @@
+"""Add table versions maintained by triggers
+
+Revision ID: 9d4e2b7c1a6f
+Revises: 5c1f0e9a7b3d
+Create Date: 2026-10-18 14:03:27.904112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d4e2b7c1a6f'
+down_revision: Union[str, None] = '5c1f0e9a7b3d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+VERSIONED_TABLES = ('authors', 'books')
+
+
+def upgrade() -> None:
+    op.create_table(
+        'table_versions',
+        sa.Column('table_name', sa.String(), nullable=False),
+        sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('table_name')
+    )
+    op.execute("""
+        CREATE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE table_versions SET version = version + 1, updated_at = now()
+            WHERE table_name = TG_TABLE_NAME;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in VERSIONED_TABLES:
+        op.execute(f"INSERT INTO table_versions (table_name) VALUES ('{table}')")
+        # Statement-level, so a bulk import bumps the version once per statement, not per row.
+        op.execute(f"""
+            CREATE TRIGGER {table}_bump_version
+            AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+        """)
+
+
+def downgrade() -> None:
+    for table in VERSIONED_TABLES:
+        op.execute(f"DROP TRIGGER {table}_bump_version ON {table}")
+    op.execute("DROP FUNCTION bump_table_version()")
+    op.drop_table('table_versions')
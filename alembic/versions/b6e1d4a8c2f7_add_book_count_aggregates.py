@@ -0,0 +1,106 @@
+"""Add book count aggregates maintained by triggers
+
+Revision ID: b6e1d4a8c2f7
+Revises: 3f8a6c2d9e41
+Create Date: 2026-10-18 17:26:48.630871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6e1d4a8c2f7'
+down_revision: Union[str, None] = '3f8a6c2d9e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (table, group column, column type, expression over a books row)
+DIMENSIONS = (
+    ('book_counts_by_genre', 'genre', sa.String(), 'genre'),
+    ('book_counts_by_author', 'author_id', sa.Integer(), 'author_id'),
+    ('book_counts_by_decade', 'decade', sa.Integer(), 'published_year / 10 * 10'),
+)
+
+
+def upgrade() -> None:
+    for table, column, column_type, expression in DIMENSIONS:
+        op.create_table(
+            table,
+            sa.Column(column, column_type, nullable=False),
+            sa.Column('books', sa.BigInteger(), nullable=False),
+            sa.PrimaryKeyConstraint(column)
+        )
+        op.execute(f"INSERT INTO {table} ({column}, books) SELECT {expression}, count(*) FROM books GROUP BY 1")
+
+    dimensions = ",\n                ".join(
+        f"('{table}', '{column}', '{expression}')" for table, column, _, expression in DIMENSIONS
+    )
+    # The changed rows of each statement come in as transition tables, so an import of any size
+    # costs one grouped upsert per dimension, and groups that drop to zero books are removed.
+    op.execute(f"""
+        CREATE FUNCTION count_books() RETURNS trigger AS $$
+        DECLARE
+            changes text;
+            dimension record;
+        BEGIN
+            changes := CASE TG_OP
+                WHEN 'INSERT' THEN 'SELECT *, 1 AS delta FROM new_rows'
+                WHEN 'DELETE' THEN 'SELECT *, -1 AS delta FROM old_rows'
+                ELSE 'SELECT *, 1 AS delta FROM new_rows UNION ALL SELECT *, -1 FROM old_rows'
+            END;
+            FOR dimension IN SELECT * FROM (VALUES
+                {dimensions}
+            ) AS d(table_name, column_name, expression)
+            LOOP
+                EXECUTE format(
+                    'INSERT INTO %1$I (%2$I, books)
+                     SELECT %3$s, sum(delta) FROM (%4$s) AS changes GROUP BY 1 HAVING sum(delta) <> 0
+                     ON CONFLICT (%2$I) DO UPDATE SET books = %1$I.books + excluded.books',
+                    dimension.table_name, dimension.column_name, dimension.expression, changes
+                );
+                EXECUTE format('DELETE FROM %I WHERE books <= 0', dimension.table_name);
+            END LOOP;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute(f"""
+        CREATE FUNCTION clear_book_counts() RETURNS trigger AS $$
+        BEGIN
+            TRUNCATE {', '.join(table for table, *_ in DIMENSIONS)};
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    # Transition tables need one trigger per event.
+    op.execute("""
+        CREATE TRIGGER books_count_insert AFTER INSERT ON books
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION count_books()
+    """)
+    op.execute("""
+        CREATE TRIGGER books_count_update AFTER UPDATE ON books
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION count_books()
+    """)
+    op.execute("""
+        CREATE TRIGGER books_count_delete AFTER DELETE ON books
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE FUNCTION count_books()
+    """)
+    op.execute("""
+        CREATE TRIGGER books_count_truncate AFTER TRUNCATE ON books
+        FOR EACH STATEMENT EXECUTE FUNCTION clear_book_counts()
+    """)
+
+
+def downgrade() -> None:
+    for trigger in ('books_count_truncate', 'books_count_delete', 'books_count_update', 'books_count_insert'):
+        op.execute(f"DROP TRIGGER {trigger} ON books")
+    op.execute("DROP FUNCTION clear_book_counts()")
+    op.execute("DROP FUNCTION count_books()")
+    for table, *_ in reversed(DIMENSIONS):
+        op.drop_table(table)
@@ -0,0 +1,68 @@
+"""Add row counts to table versions
+
+Revision ID: e2a9f7c4b1d3
+Revises: b6e1d4a8c2f7
+Create Date: 2026-10-18 18:12:55.407316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2a9f7c4b1d3'
+down_revision: Union[str, None] = 'b6e1d4a8c2f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTED_TABLES = ('authors', 'books')
+
+
+def upgrade() -> None:
+    op.add_column('table_versions', sa.Column('row_count', sa.BigInteger(), server_default='0', nullable=False))
+    for table in COUNTED_TABLES:
+        op.execute(f"UPDATE table_versions SET row_count = (SELECT count(*) FROM {table}) WHERE table_name = '{table}'")
+
+    # Every insert and delete updates the table's table_versions row, so writers to the same
+    # table serialize on its lock until commit; 2d7f9b3e8c51 moves the count to table_changes.
+    op.execute("""
+        CREATE FUNCTION count_table_rows() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                UPDATE table_versions SET row_count = row_count + (SELECT count(*) FROM new_rows)
+                WHERE table_name = TG_TABLE_NAME;
+            ELSIF TG_OP = 'DELETE' THEN
+                UPDATE table_versions SET row_count = row_count - (SELECT count(*) FROM old_rows)
+                WHERE table_name = TG_TABLE_NAME;
+            ELSE
+                UPDATE table_versions SET row_count = 0 WHERE table_name = TG_TABLE_NAME;
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in COUNTED_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_row_count_insert AFTER INSERT ON {table}
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION count_table_rows()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_row_count_delete AFTER DELETE ON {table}
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION count_table_rows()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_row_count_truncate AFTER TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION count_table_rows()
+        """)
+
+
+def downgrade() -> None:
+    for table in COUNTED_TABLES:
+        for event in ('truncate', 'delete', 'insert'):
+            op.execute(f"DROP TRIGGER {table}_row_count_{event} ON {table}")
+    op.execute("DROP FUNCTION count_table_rows()")
+    op.drop_column('table_versions', 'row_count')
@@ -7,6 +7,49 @@ load_dotenv()
 class Settings:
     SECRET_KEY: str = os.getenv("SECRET_KEY")
     DATABASE_URL: str = os.getenv("DATABASE_URL")
+    DATABASE_REPLICA_URLS: list[str] = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",")
+                                        if url.strip()]
+    # "round_robin" or "least_load".
+    REPLICA_STRATEGY: str = os.getenv("REPLICA_STRATEGY", "round_robin")
+    REPLICA_HEALTH_CHECK_INTERVAL: float = float(os.getenv("REPLICA_HEALTH_CHECK_INTERVAL", 10))
+    READ_PRIMARY_WINDOW: int = int(os.getenv("READ_PRIMARY_WINDOW", 10))
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    DB_STATEMENT_CACHE_SIZE: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", 100))
+    # "false", "true" (statements) or "debug" (statements and result rows).
+    DB_ECHO: str = os.getenv("DB_ECHO", "false").lower()
+    JWT_BACKEND: str = os.getenv("JWT_BACKEND", "jose")
+    JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
+    TOKEN_CACHE_TTL: int = int(os.getenv("TOKEN_CACHE_TTL", 300))
+    TOKEN_CACHE_MAX_ENTRIES: int = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", 10000))
+    PASSWORD_HASH_CONCURRENCY: int = int(os.getenv("PASSWORD_HASH_CONCURRENCY", 4))
+    PASSWORD_CACHE_TTL: int = int(os.getenv("PASSWORD_CACHE_TTL", 0))
+    TOTAL_COUNT_ESTIMATE_THRESHOLD: int = int(os.getenv("TOTAL_COUNT_ESTIMATE_THRESHOLD", 10000))
+    BULK_MAX_ITEMS: int = int(os.getenv("BULK_MAX_ITEMS", 50000))
+    IMPORT_WORKERS: int = int(os.getenv("IMPORT_WORKERS", 2))
+    IMPORT_QUEUE_SIZE: int = int(os.getenv("IMPORT_QUEUE_SIZE", 16))
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_TTL: int = int(os.getenv("CACHE_TTL", 300))
+    CACHE_MAX_ENTRIES: int = int(os.getenv("CACHE_MAX_ENTRIES", 10_000))
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    LIST_CACHE_MAX_BYTES: int = int(os.getenv("LIST_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    LIST_CACHE_TTL: int = int(os.getenv("LIST_CACHE_TTL", 60))
+    CACHE_CONTROL_BOOKS: str = os.getenv("CACHE_CONTROL_BOOKS", "public, no-cache")
+    CACHE_CONTROL_AUTHORS: str = os.getenv("CACHE_CONTROL_AUTHORS", "public, no-cache")
+    CACHE_CONTROL_EXPORTS: str = os.getenv("CACHE_CONTROL_EXPORTS", "private, no-cache")
+    CACHE_CONTROL_STATS: str = os.getenv("CACHE_CONTROL_STATS", "public, no-cache")
+    ROLLUP_INTERVAL: float = float(os.getenv("ROLLUP_INTERVAL", 60))
+    RATE_LIMIT_BACKEND: str = os.getenv("RATE_LIMIT_BACKEND", "memory")
+    RATE_LIMIT_WINDOW: int = int(os.getenv("RATE_LIMIT_WINDOW", 60))
+    RATE_LIMIT_REQUESTS: int = int(os.getenv("RATE_LIMIT_REQUESTS", 20))
+    IMPORT_RATE_LIMIT_REQUESTS: int = int(os.getenv("IMPORT_RATE_LIMIT_REQUESTS", 5))
+    EXPORT_RATE_LIMIT_REQUESTS: int = int(os.getenv("EXPORT_RATE_LIMIT_REQUESTS", 10))
+    RECOMMEND_CACHE_TTL: int = int(os.getenv("RECOMMEND_CACHE_TTL", 300))
+    RECOMMEND_MAX_POOLS: int = int(os.getenv("RECOMMEND_MAX_POOLS", 128))
+    RECOMMEND_POOL_MAX_SIZE: int = int(os.getenv("RECOMMEND_POOL_MAX_SIZE", 100_000))
 
 
 settings = Settings()
@@ -1,33 +1,43 @@
 from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from typing import Optional
+from app.crud.cache import author_key, author_tag, entity_cache
+from app.crud.counts import table_row_count
+from app.database import UNIQUE_VIOLATION, is_replica_session, violated_constraint
 from app.models import Author, Book
-from app.schemas.authors import AuthorSchema
+from app.schemas.authors import AuthorSchema, AuthorPage
+from app.utils.events import notify_change
+from app.utils.pagination import decode_cursor, encode_cursor
 
 
 async def create_author(db: AsyncSession, name: str):
-
-    existing_author = await db.execute(select(Author).filter(Author.name == name))
-    existing_author = existing_author.scalars().first()
-
-    if existing_author:
-        raise HTTPException(status_code=400, detail=f"Author with name '{name}' already exists.")
-
     if not name.strip():
         raise HTTPException(status_code=400, detail="Name is required and can't be empty.")
 
     try:
-        db_author = Author(name=name)
-        db.add(db_author)
-        await db.commit()
-        await db.refresh(db_author)
+        result = await db.execute(
+            pg_insert(Author).values(name=name)
+            .on_conflict_do_nothing(index_elements=[Author.name])
+            .returning(Author)
+        )
+        db_author = result.scalars().first()
     except Exception as e:
         raise HTTPException(status_code=500, detail="An unexpected error occurred while processing your request")
 
-    return AuthorSchema.from_orm(db_author)
+    if db_author is None:
+        raise HTTPException(status_code=400, detail=f"Author with name '{name}' already exists.")
+
+    created_author = AuthorSchema.from_orm(db_author)
+    await db.commit()
+    notify_change("authors")
+    return created_author
 
 
-async def get_author_by_id(db: AsyncSession, author_id: int):
+async def _get_author(db: AsyncSession, author_id: int):
     try:
         result = await db.execute(select(Author).filter(Author.id == author_id))
         author = result.scalars().first()
@@ -40,6 +50,17 @@ async def get_author_by_id(db: AsyncSession, author_id: int):
     return author
 
 
+async def get_author_by_id(db: AsyncSession, author_id: int, version: Optional[str] = None):
+
+    async def load_author():
+        return AuthorSchema.from_orm(await _get_author(db, author_id)).model_dump(mode="json")
+
+    author = await entity_cache.get_or_load(author_key(author_id), load_author,
+                                            tags=lambda author: [author_tag(author_id)],
+                                            store=not is_replica_session(db), version=version)
+    return AuthorSchema.model_validate(author)
+
+
 async def get_authors_list(db: AsyncSession, skip: int = 0, limit: int = 10):
     try:
         result = await db.execute(select(Author).offset(skip).limit(limit))
@@ -48,31 +69,59 @@ async def get_authors_list(db: AsyncSession, skip: int = 0, limit: int = 10):
     return result.scalars().all()
 
 
-async def update_author_by_id(db: AsyncSession, author_id: int, name: str):
-    try:
-        db_author = await get_author_by_id(db, author_id)
+async def count_authors(db: AsyncSession) -> tuple[int, str]:
+    # Author listings aren't filtered, so the trigger-kept counter is always exact.
+    return await table_row_count(db, "authors"), "exact"
+
 
-        existing_author = await db.execute(select(Author).filter(Author.name == name))
-        existing_author = existing_author.scalars().first()
+async def get_authors_page(db: AsyncSession, limit: int = 10, cursor: Optional[str] = None):
+    query = select(Author).order_by(Author.id).limit(limit + 1)
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.where(Author.id > last_id)
+
+    try:
+        result = await db.execute(query)
     except Exception as e:
         raise HTTPException(status_code=500, detail="An unexpected error occurred while processing your request")
 
-    if existing_author:
-        raise HTTPException(status_code=400, detail=f"Author with name '{name}' already exists.")
+    authors = result.scalars().all()
+    next_cursor = None
+    if len(authors) > limit:
+        authors = authors[:limit]
+        if authors:
+            next_cursor = encode_cursor(authors[-1].id)
+
+    return AuthorPage(items=[AuthorSchema.from_orm(author) for author in authors], next_cursor=next_cursor)
+
+
+async def update_author_by_id(db: AsyncSession, author_id: int, name: str):
+    try:
+        result = await db.execute(
+            update(Author).where(Author.id == author_id).values(name=name)
+            .returning(Author).execution_options(populate_existing=True)
+        )
+        db_author = result.scalars().first()
+    except IntegrityError as e:
+        await db.rollback()
+        if violated_constraint(e)[0] == UNIQUE_VIOLATION:
+            raise HTTPException(status_code=400, detail=f"Author with name '{name}' already exists.")
+        raise HTTPException(status_code=400, detail="The author could not be updated.")
 
     if db_author is None:
         raise HTTPException(status_code=404, detail=f"Author with id: {author_id} not found")
 
-    if db_author:
-        db_author.name = name
-        await db.commit()
-        await db.refresh(db_author)
-    return db_author
+    updated_author = AuthorSchema.from_orm(db_author)
+    await db.commit()
+    notify_change("authors")
+    # Cached books embed the author's name.
+    await entity_cache.invalidate_tag(author_tag(author_id))
+    return updated_author
 
 
 async def delete_author_by_id(db: AsyncSession, author_id: int):
     try:
-        db_author = await get_author_by_id(db, author_id)
+        db_author = await _get_author(db, author_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail="An unexpected error occurred while processing your request")
 
@@ -88,5 +137,7 @@ async def delete_author_by_id(db: AsyncSession, author_id: int):
 
     await db.delete(db_author)
     await db.commit()
+    notify_change("authors")
+    await entity_cache.invalidate_tag(author_tag(author_id))
 
     return {"message": f"Author with id: {author_id} successfully deleted"}
@@ -1,73 +1,110 @@
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
-from sqlalchemy import and_, asc, desc
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import aliased, contains_eager, selectinload
+from sqlalchemy import and_, asc, desc, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from typing import Optional
+from app.crud.cache import author_tag, book_key, entity_cache
+from app.crud.counts import count_total, table_row_count
+from app.database import FOREIGN_KEY_VIOLATION, UNIQUE_VIOLATION, is_replica_session, violated_constraint
 from app.models import Book, Author
-from app.schemas.books import BookSchema, BookDeleteResponse
+from app.schemas.books import BookSchema, BookDeleteResponse, BookFilterParams
+from app.utils.events import notify_change
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def select_written_book(statement):
+    # Run the INSERT or UPDATE as a CTE and read the row back joined to its author, in one statement.
+    written = statement.returning(*Book.__table__.c).cte("written_book")
+    written_book = aliased(Book, written)
+    return (
+        select(written_book).join(written_book.author).options(contains_eager(written_book.author))
+        .execution_options(populate_existing=True)
+    )
 
 
 async def create_book(db: AsyncSession, title: str, genre: str, published_year: int, author_id: int):
+    # Titles are unique across the catalogue, so a taken title inserts nothing.
+    query = select_written_book(
+        pg_insert(Book.__table__)
+        .values(title=title, genre=genre, published_year=published_year, author_id=author_id)
+        .on_conflict_do_nothing(index_elements=["title"])
+    )
 
-    result = await db.execute(select(Book).filter(Book.title == title))
-    existing_book = result.scalars().first()
+    try:
+        result = await db.execute(query)
+        db_book = result.scalars().first()
+    except IntegrityError as e:
+        await db.rollback()
+        if violated_constraint(e)[0] == FOREIGN_KEY_VIOLATION:
+            raise HTTPException(status_code=404, detail=f"Author with id: {author_id} does not exist.")
+        raise HTTPException(status_code=400, detail=f"Book with title '{title}' already exists.")
 
-    if existing_book:
+    if db_book is None:
         raise HTTPException(status_code=400, detail=f"Book with title '{title}' already exists.")
 
-    result = await db.execute(select(Author).filter(Author.id == author_id))
-    existing_author = result.scalars().first()
+    created_book = BookSchema.from_orm(db_book)
+    await db.commit()
+    notify_change("books")
+    return created_book
 
-    if not existing_author:
-        raise HTTPException(status_code=404, detail=f"Author with id: {author_id} does not exist.")
 
-    try:
-        db_book = Book(title=title, genre=genre, published_year=published_year, author_id=author_id)
-        db.add(db_book)
-        await db.commit()
-        await db.refresh(db_book)
+async def get_book_by_id(db: AsyncSession, book_id: int, version: Optional[str] = None):
 
-        result = await db.execute(select(Book).filter(Book.id == db_book.id).options(selectinload(Book.author)))
-        db_book_with_author = result.scalars().first()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="An unexpected error occurred while processing your request")
+    async def load_book():
+        try:
+            result = await db.execute(select_book_rows().filter(Book.id == book_id))
+            book = result.first()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail="An unexpected error occurred while processing your request")
 
-    return BookSchema.from_orm(db_book_with_author)
+        if not book:
+            raise HTTPException(status_code=404, detail=f"Book with id: {book_id} not found")
 
+        return book_row_to_dict(book)
 
-async def get_book_by_id(db: AsyncSession, book_id: int):
+    return await entity_cache.get_or_load(book_key(book_id), load_book,
+                                          tags=lambda book: [author_tag(book["author_id"])],
+                                          store=not is_replica_session(db), version=version)
 
-    try:
-        result = await db.execute(
-            select(Book).filter(Book.id == book_id).options(selectinload(Book.author))
-        )
-        book = result.scalars().first()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="An unexpected error occurred while processing your request")
 
-    if not book:
-        raise HTTPException(status_code=404, detail=f"Book with id: {book_id} not found")
+def select_books_with_authors():
+    return select(Book).join(Book.author).options(contains_eager(Book.author))
 
-    return BookSchema.from_orm(book)
 
+def select_book_rows():
+    # Plain rows for read paths that only serialize: no ORM identity map or model validation.
+    return select(Book.id, Book.title, Book.genre, Book.published_year, Book.author_id, Author.name).join(Book.author)
 
-async def get_books_list(
-    db: AsyncSession,
-    skip: int = 0,
-    limit: int = 10,
+
+def book_row_to_dict(row) -> dict:
+    """A ``select_book_rows`` row in the shape and field order of ``BookSchema``."""
+    return {
+        "title": row.title,
+        "genre": row.genre,
+        "published_year": row.published_year,
+        "author_id": row.author_id,
+        "id": row.id,
+        "author": {"name": row.name, "id": row.author_id},
+    }
+
+
+def build_book_filters(
     title: Optional[str] = None,
     author_name: Optional[str] = None,
     genre: Optional[str] = None,
     year_from: Optional[int] = None,
     year_to: Optional[int] = None,
-    sort_by: Optional[str] = None,
-    sort_order: Optional[str] = "asc",
 ):
+    # Filtering and ordering on the author name expect the query to be joined with Author.
     filters = []
 
     if title:
         filters.append(Book.title.ilike(f"%{title}%"))
+    if author_name:
+        filters.append(Author.name.ilike(f"%{author_name}%"))
     if genre:
         filters.append(Book.genre.ilike(f"%{genre}%"))
     if year_from is not None:
@@ -75,76 +112,175 @@ async def get_books_list(
     if year_to is not None:
         filters.append(Book.published_year <= year_to)
 
-    if author_name:
-        author_result = await db.execute(select(Author.id).filter(Author.name.ilike(f"%{author_name}%")))
-        author_ids = author_result.scalars().all()
-        if author_ids:
-            filters.append(Book.author_id.in_(author_ids))
-        else:
-            return []
+    return filters
+
+
+def book_list_cache_key(filter_params: BookFilterParams, **pagination) -> tuple:
+    # Text filters are case-insensitive matches, so differently cased requests share an entry.
+    params = filter_params.model_dump()
+    for field in ("title", "author_name", "genre"):
+        if params[field]:
+            params[field] = params[field].lower()
+    return tuple(sorted(params.items())) + tuple(sorted(pagination.items()))
+
+
+def build_book_ordering(sort_by: Optional[str] = None, sort_order: Optional[str] = "asc"):
+    if sort_by == "author_name":
+        sort_field = Author.name
+    elif sort_by and hasattr(Book, sort_by):
+        sort_field = getattr(Book, sort_by)
+    else:
+        return []
+
+    return [asc(sort_field) if sort_order == "asc" else desc(sort_field)]
+
+
+async def get_books_list(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 10,
+    title: Optional[str] = None,
+    author_name: Optional[str] = None,
+    genre: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    sort_by: Optional[str] = None,
+    sort_order: Optional[str] = "asc",
+):
+    filters = build_book_filters(title=title, author_name=author_name, genre=genre,
+                                 year_from=year_from, year_to=year_to)
 
     query = (
-        select(Book)
-        .options(selectinload(Book.author))
+        select_book_rows()
         .where(and_(*filters) if filters else True)
+        .order_by(*build_book_ordering(sort_by, sort_order))
         .offset(skip)
         .limit(limit)
     )
 
-    if sort_by:
-        if sort_by == "author_name":
-            query = query.join(Author).order_by(
-                asc(Author.name) if sort_order == "asc" else desc(Author.name)
-            )
-        elif hasattr(Book, sort_by):
-            sort_field = getattr(Book, sort_by)
-            query = query.order_by(
-                asc(sort_field) if sort_order == "asc" else desc(sort_field)
-            )
+    try:
+        result = await db.execute(query)
+        books = result.all()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail="An unexpected error occurred while processing your request")
+
+    return [book_row_to_dict(book) for book in books]
+
+
+async def count_books(
+    db: AsyncSession,
+    mode: str = "exact",
+    title: Optional[str] = None,
+    author_name: Optional[str] = None,
+    genre: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+) -> tuple[int, str]:
+    filters = build_book_filters(title=title, author_name=author_name, genre=genre,
+                                 year_from=year_from, year_to=year_to)
+    if not filters:
+        # The trigger-kept counter is exact and as cheap as any estimate.
+        return await table_row_count(db, "books"), "exact"
+    return await count_total(db, select(Book.id).join(Book.author).where(*filters), mode)
+
+
+def book_keyset_column(sort_by: Optional[str]):
+    if sort_by == "author_name":
+        return Author.name
+    if sort_by in ("title", "genre", "published_year", "author_id"):
+        return getattr(Book, sort_by)
+    return None
+
+
+async def get_books_page(
+    db: AsyncSession,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    title: Optional[str] = None,
+    author_name: Optional[str] = None,
+    genre: Optional[str] = None,
+    year_from: Optional[int] = None,
+    year_to: Optional[int] = None,
+    sort_by: Optional[str] = None,
+    sort_order: Optional[str] = "asc",
+):
+    filters = build_book_filters(title=title, author_name=author_name, genre=genre,
+                                 year_from=year_from, year_to=year_to)
+
+    sort_field = book_keyset_column(sort_by)
+    sort_key = sort_by if sort_field is not None else "id"
+    ascending = sort_order == "asc"
+    keyset = [sort_field, Book.id] if sort_field is not None else [Book.id]
+
+    query = select_book_rows().where(*filters)
+
+    if cursor:
+        column_types = [column.type.python_type for column in keyset]
+        cursor_key, cursor_order, *position = decode_cursor(cursor, str, str, *column_types)
+        if cursor_key != sort_key or cursor_order != sort_order:
+            raise HTTPException(status_code=400, detail="Invalid cursor.")
+        position = tuple_(*position)
+        query = query.where(tuple_(*keyset) > position if ascending else tuple_(*keyset) < position)
+
+    query = query.order_by(*[asc(column) if ascending else desc(column) for column in keyset]).limit(limit + 1)
 
     try:
         result = await db.execute(query)
-        books = result.scalars().all()
+        books = result.all()
     except Exception as e:
         raise HTTPException(status_code=500, detail="An unexpected error occurred while processing your request")
 
-    return [BookSchema.from_orm(book) for book in books]
+    next_cursor = None
+    if len(books) > limit:
+        books = books[:limit]
+        if books:
+            last = books[-1]
+            position = [last.id]
+            if sort_by == "author_name":
+                position.insert(0, last.name)
+            elif sort_field is not None:
+                position.insert(0, getattr(last, sort_by))
+            next_cursor = encode_cursor(sort_key, sort_order, *position)
+
+    # The same shape as BookPage, built without validating trusted rows.
+    return {"items": [book_row_to_dict(book) for book in books], "next_cursor": next_cursor}
 
 
 async def update_book_by_id(db: AsyncSession, book_id: int, title: str, genre: str, published_year: int,
                             author_id: int):
+    values = {
+        field: value for field, value in
+        (("title", title), ("genre", genre), ("published_year", published_year), ("author_id", author_id))
+        if value
+    }
+    if not values:
+        return await get_book_by_id(db=db, book_id=book_id)
+
+    # A missing author or a taken title surfaces as the constraint violation rather than from
+    # a separate check.
+    query = select_written_book(update(Book.__table__).where(Book.id == book_id).values(**values))
 
     try:
-        result = await db.execute(select(Book).filter(Book.id == book_id).options(selectinload(Book.author)))
+        result = await db.execute(query)
         db_book = result.scalars().first()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail="An unexpected error occurred while processing your request")
+    except IntegrityError as e:
+        await db.rollback()
+        sqlstate = violated_constraint(e)[0]
+        if sqlstate == FOREIGN_KEY_VIOLATION:
+            raise HTTPException(status_code=404, detail=f"Author with id: {author_id} does not exist.")
+        if sqlstate == UNIQUE_VIOLATION:
+            raise HTTPException(status_code=400, detail=f"Book with title '{title}' already exists.")
+        raise HTTPException(status_code=400, detail="The book could not be updated.")
 
     if not db_book:
         raise HTTPException(status_code=404, detail=f"Book with id: {book_id} not found")
 
-    result = await db.execute(select(Author).filter(Author.id == author_id))
-    existing_author = result.scalars().first()
-
-    if not existing_author:
-        raise HTTPException(status_code=404, detail=f"Author with id: {author_id} does not exist.")
-
-    if title:
-        db_book.title = title
-    if genre:
-        db_book.genre = genre
-    if published_year:
-        db_book.published_year = published_year
-    if author_id:
-        db_book.author_id = author_id
-
+    updated_schema = BookSchema.from_orm(db_book)
     await db.commit()
-    await db.refresh(db_book)
-
-    result = await db.execute(select(Book).filter(Book.id == db_book.id).options(selectinload(Book.author)))
-    updated_book = result.scalars().first()
+    notify_change("books")
+    await entity_cache.delete(book_key(book_id))
 
-    return BookSchema.from_orm(updated_book)
+    return updated_schema
 
 
 async def delete_book_by_id(db: AsyncSession, book_id: int):
@@ -159,5 +295,7 @@ async def delete_book_by_id(db: AsyncSession, book_id: int):
 
     await db.delete(db_book)
     await db.commit()
+    notify_change("books")
+    await entity_cache.delete(book_key(book_id))
 
     return BookDeleteResponse(message="Book successfully deleted")
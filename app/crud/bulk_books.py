@@ -0,0 +1,227 @@
+from typing import Awaitable, Callable, Iterable
+from fastapi import HTTPException
+from sqlalchemy import Integer, String, any_, bindparam, delete, insert, literal_column, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.config import settings
+from app.crud.cache import book_key, entity_cache
+from app.models import Author, Book
+from app.schemas.books import BookBulkResponse, BookBulkResult, BookCreate, BookPatch
+from app.utils.events import notify_change
+
+
+class BulkResults:
+    """Per-item outcome of a bulk request, reported in the order the items were sent."""
+
+    def __init__(self, size: int):
+        self.results = [None] * size
+        self.counts = {"created": 0, "updated": 0, "deleted": 0, "failed": 0}
+
+    def set(self, index: int, status: str, book_id: int):
+        self.results[index] = BookBulkResult(index=index, status=status, id=book_id)
+        self.counts[status] += 1
+
+    def fail(self, index: int, detail: str, book_id: int = None):
+        self.results[index] = BookBulkResult(index=index, status="error", id=book_id, detail=detail)
+        self.counts["failed"] += 1
+
+    def response(self) -> BookBulkResponse:
+        return BookBulkResponse(**self.counts, results=self.results)
+
+
+def check_batch_size(items: list):
+    if len(items) > settings.BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {settings.BULK_MAX_ITEMS} books can be sent per request.")
+
+
+# Each lookup binds one array, so it stays a single statement with a single parameter
+# however many items the request holds.
+
+async def find_books_by_title(db: AsyncSession, titles: Iterable[str], column=Book.id) -> dict[str, set]:
+    """``column`` (the id by default) of the books holding each of ``titles``."""
+    result = await db.execute(
+        select(Book.title, column).where(Book.title == any_(bindparam("titles", list(titles), type_=ARRAY(String))))
+    )
+    books = {}
+    for title, value in result.tuples():
+        books.setdefault(title, set()).add(value)
+    return books
+
+
+async def find_missing_authors(db: AsyncSession, author_ids: Iterable[int]) -> set[int]:
+    author_ids = set(author_ids)
+    result = await db.execute(
+        select(Author.id).where(Author.id == any_(bindparam("author_ids", list(author_ids), type_=ARRAY(Integer))))
+    )
+    return author_ids - set(result.scalars())
+
+
+async def insert_books(db: AsyncSession, rows: list[dict]) -> list[int]:
+    if not rows:
+        return []
+    result = await db.execute(insert(Book).returning(Book.id, sort_by_parameter_order=True), rows)
+    return list(result.scalars())
+
+
+async def apply_bulk(db: AsyncSession, write: Callable[[], Awaitable[None]], changed_ids: Iterable[int] = ()):
+    """Run ``write`` and commit, so a request is applied entirely or not at all.
+
+    Validation runs first and only valid items reach ``write``; a constraint violation
+    here means another request changed the same rows in the meantime.
+    """
+    try:
+        await write()
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="The books were changed concurrently; nothing was written.")
+    notify_change("books")
+    await entity_cache.delete(*[book_key(book_id) for book_id in changed_ids])
+
+
+async def bulk_create_books(db: AsyncSession, books: list[BookCreate]) -> BookBulkResponse:
+    check_batch_size(books)
+    results = BulkResults(len(books))
+    taken_titles = set(await find_books_by_title(db, {book.title for book in books}))
+    missing_authors = await find_missing_authors(db, {book.author_id for book in books})
+
+    rows, indexes = [], []
+    for index, book in enumerate(books):
+        if book.title in taken_titles:
+            results.fail(index, f"Book with title '{book.title}' already exists.")
+        elif book.author_id in missing_authors:
+            results.fail(index, f"Author with id: {book.author_id} does not exist.")
+        else:
+            taken_titles.add(book.title)
+            rows.append(book.model_dump(mode="json"))
+            indexes.append(index)
+
+    async def write():
+        for index, book_id in zip(indexes, await insert_books(db, rows)):
+            results.set(index, "created", book_id)
+
+    await apply_bulk(db, write)
+    return results.response()
+
+
+async def bulk_upsert_books(db: AsyncSession, books: list[BookCreate]) -> BookBulkResponse:
+    """Update the book with the same title and author, or create it.
+
+    Books are matched on their title, which is unique, with ``INSERT ... ON CONFLICT DO UPDATE``.
+    As with create, a title another author's book already has is refused, including one
+    committed by another request after the titles were looked up.
+    """
+    check_batch_size(books)
+    results = BulkResults(len(books))
+    title_authors = await find_books_by_title(db, {book.title for book in books}, column=Book.author_id)
+    missing_authors = await find_missing_authors(db, {book.author_id for book in books})
+
+    rows, indexes, claimed_titles = {}, {}, set()
+    for index, book in enumerate(books):
+        key = (book.title, book.author_id)
+        if key in rows:
+            # A single INSERT ... ON CONFLICT can't change the same row twice.
+            results.fail(index, f"Book with title '{book.title}' appears more than once for this author.")
+        elif title_authors.get(book.title, set()) - {book.author_id} or book.title in claimed_titles:
+            results.fail(index, f"Book with title '{book.title}' already exists.")
+        elif book.author_id in missing_authors:
+            results.fail(index, f"Author with id: {book.author_id} does not exist.")
+        else:
+            rows[key] = book.model_dump(mode="json")
+            indexes[key] = index
+            claimed_titles.add(book.title)
+
+    upsert = pg_insert(Book.__table__)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=["title"],
+        set_={"genre": upsert.excluded.genre, "published_year": upsert.excluded.published_year},
+        # Left alone, and so not returned, when the title belongs to another author.
+        where=Book.author_id == upsert.excluded.author_id,
+    ).returning(Book.id, Book.title, Book.author_id, literal_column("xmax = 0").label("inserted"))
+    updated_ids = []
+
+    async def write():
+        if not rows:
+            return
+        result = await db.execute(upsert, list(rows.values()))
+        for book_id, title, author_id, inserted in result.tuples():
+            results.set(indexes.pop((title, author_id)), "created" if inserted else "updated", book_id)
+            if not inserted:
+                updated_ids.append(book_id)
+        for (title, _), index in indexes.items():
+            results.fail(index, f"Book with title '{title}' already exists.")
+
+    await apply_bulk(db, write, updated_ids)
+    return results.response()
+
+
+async def bulk_patch_books(db: AsyncSession, books: list[BookPatch]) -> BookBulkResponse:
+    check_batch_size(books)
+    results = BulkResults(len(books))
+
+    result = await db.execute(
+        select(Book.id).where(Book.id == any_(bindparam("ids", list({book.id for book in books}), type_=ARRAY(Integer))))
+    )
+    existing_ids = set(result.scalars())
+    by_title = await find_books_by_title(db, {book.title for book in books if book.title})
+    missing_authors = await find_missing_authors(db, {book.author_id for book in books if book.author_id})
+
+    seen_ids, claimed_titles = set(), set()
+    updates, update_indexes = [], []
+    for index, book in enumerate(books):
+        if book.id in seen_ids:
+            results.fail(index, f"Book with id: {book.id} appears more than once.", book.id)
+        elif book.id not in existing_ids:
+            results.fail(index, f"Book with id: {book.id} not found", book.id)
+        elif book.title and (by_title.get(book.title, set()) - {book.id} or book.title in claimed_titles):
+            results.fail(index, f"Book with title '{book.title}' already exists.", book.id)
+        elif book.author_id and book.author_id in missing_authors:
+            results.fail(index, f"Author with id: {book.author_id} does not exist.", book.id)
+        else:
+            seen_ids.add(book.id)
+            if book.title:
+                claimed_titles.add(book.title)
+            updates.append(book.model_dump(mode="json", exclude_none=True))
+            update_indexes.append(index)
+
+    async def write():
+        # Rows are grouped by the set of fields they change, one executemany per group.
+        changed = [row for row in updates if len(row) > 1]
+        if changed:
+            await db.execute(update(Book), changed)
+        for index, row in zip(update_indexes, updates):
+            results.set(index, "updated", row["id"])
+
+    await apply_bulk(db, write, [row["id"] for row in updates])
+    return results.response()
+
+
+async def bulk_delete_books(db: AsyncSession, book_ids: list[int]) -> BookBulkResponse:
+    check_batch_size(book_ids)
+    results = BulkResults(len(book_ids))
+
+    deleted = set()
+
+    async def write():
+        result = await db.execute(
+            delete(Book)
+            .where(Book.id == any_(bindparam("ids", list(set(book_ids)), type_=ARRAY(Integer))))
+            .returning(Book.id)
+            .execution_options(synchronize_session=False)
+        )
+        deleted.update(result.scalars())
+
+        reported = set()
+        for index, book_id in enumerate(book_ids):
+            if book_id in reported:
+                results.fail(index, f"Book with id: {book_id} appears more than once.", book_id)
+            elif book_id in deleted:
+                reported.add(book_id)
+                results.set(index, "deleted", book_id)
+            else:
+                results.fail(index, f"Book with id: {book_id} not found", book_id)
+
+    await apply_bulk(db, write, deleted)
+    return results.response()
@@ -0,0 +1,284 @@
+import asyncio
+import json
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable, Optional
+from app.core.config import settings
+from app.utils.events import on_change
+
+
+class CacheBackend(ABC):
+    """Storage interface for the read-through cache.
+
+    Values are JSON-compatible objects. Tags group keys so related entries can be
+    evicted together, e.g. an author and all of their books.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, *keys: str) -> None:
+        ...
+
+    @abstractmethod
+    async def invalidate_tag(self, tag: str) -> None:
+        ...
+
+
+class MemoryCacheBackend(CacheBackend):
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.tags = {}
+
+    async def get(self, key: str) -> Optional[Any]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()) -> None:
+        self._remove(key)
+        tags = tuple(tags)
+        self.entries[key] = (time.monotonic() + ttl, value, tags)
+        for tag in tags:
+            self.tags.setdefault(tag, set()).add(key)
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._remove(key)
+
+    async def invalidate_tag(self, tag: str) -> None:
+        for key in self.tags.pop(tag, ()):
+            self._remove(key)
+
+    def _remove(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+
+
+class RedisCacheBackend(CacheBackend):
+    """Backend for any client with the ``redis.asyncio`` command API (Redis, Valkey, KeyDB...)."""
+
+    def __init__(self, client, prefix: str = "bms:cache:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def get(self, key: str) -> Optional[Any]:
+        raw = await self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: int, tags: Iterable[str] = ()) -> None:
+        pipe = self.client.pipeline()
+        pipe.set(self.prefix + key, json.dumps(value), ex=ttl)
+        for tag in tags:
+            tag_key = f"{self.prefix}tag:{tag}"
+            pipe.sadd(tag_key, self.prefix + key)
+            pipe.expire(tag_key, ttl)
+        await pipe.execute()
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self.client.delete(*[self.prefix + key for key in keys])
+
+    async def invalidate_tag(self, tag: str) -> None:
+        tag_key = f"{self.prefix}tag:{tag}"
+        keys = await self.client.smembers(tag_key)
+        await self.client.delete(tag_key, *keys)
+
+
+def create_cache_backend() -> CacheBackend:
+    if settings.CACHE_BACKEND == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package") from e
+        return RedisCacheBackend(redis.from_url(settings.REDIS_URL))
+    return MemoryCacheBackend(max_entries=settings.CACHE_MAX_ENTRIES)
+
+
+class ReadThroughCache:
+    """Serve values from ``backend`` and load misses once, however many requests ask for them.
+
+    Concurrent misses on the same key wait for the first caller's load instead of each
+    querying the database. A load that overlaps an invalidation is returned but not stored,
+    so a write never gets shadowed by the value read just before it. Values are stored with
+    the ``version`` they were loaded at, and a caller asking for another version reloads, so
+    a write committed by another process is not served from this one's copy.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: int):
+        self.backend = backend
+        self.ttl = ttl
+        self.loading = {}
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]],
+                          tags: Callable[[Any], Iterable[str]] = lambda value: (), store: bool = True,
+                          version: Optional[str] = None):
+        """Return the cached value for ``key``, or load it. With ``store`` false, as for reads
+        from a replica, a loaded value is returned but not cached, and concurrent loads are
+        only shared with other callers that don't store either. With a ``version``, only a
+        value stored at that version is a hit."""
+        entry = await self.backend.get(key)
+        if isinstance(entry, list) and (version is None or entry[0] == version):
+            self.hits += 1
+            return entry[1]
+
+        loading_key = (key, version) if store else (key, version, "unstored")
+        future = self.loading.get(loading_key)
+        if future is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # Only load ourselves if it was the first caller that got cancelled.
+                if not future.cancelled():
+                    raise
+                return await self.get_or_load(key, loader, tags, store, version)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.loading[loading_key] = future
+        generation = self.generation
+        try:
+            value = await loader()
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters re-raise it; don't warn when nobody was waiting.
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            del self.loading[loading_key]
+            if not future.done():
+                future.cancel()
+
+        if store and generation == self.generation:
+            await self.backend.set(key, [version, value], self.ttl, tags(value))
+        return value
+
+    async def delete(self, *keys: str):
+        self.generation += 1
+        await self.backend.delete(*keys)
+
+    async def invalidate_tag(self, tag: str):
+        self.generation += 1
+        await self.backend.invalidate_tag(tag)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class ResultCache:
+    """Per-process cache of serialized query results, bounded by their total size in bytes.
+
+    Every committed write to a watched table bumps ``generation`` and drops all entries, and
+    a result loaded across a bump is not stored. Entries also expire after ``ttl`` seconds,
+    which bounds staleness from writes made by other processes.
+    """
+
+    def __init__(self, max_bytes: int, ttl: int):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.size = 0
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    async def get_or_load(self, key, loader: Callable[[], Awaitable[bytes]], store: bool = True) -> bytes:
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[1]
+
+        self.misses += 1
+        generation = self.generation
+        body = await loader()
+        if store and generation == self.generation:
+            self._put(key, body)
+        return body
+
+    def _put(self, key, body: bytes):
+        self._remove(key)
+        if len(body) > self.max_bytes:
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, body)
+        self.size += len(body)
+        while self.size > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.size -= len(entry[1])
+
+    def bump(self, table: Optional[str] = None):
+        self.generation += 1
+        self.entries.clear()
+        self.size = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+
+entity_cache = ReadThroughCache(create_cache_backend(), ttl=settings.CACHE_TTL)
+book_list_cache = ResultCache(max_bytes=settings.LIST_CACHE_MAX_BYTES, ttl=settings.LIST_CACHE_TTL)
+on_change("books", "authors")(book_list_cache.bump)
+
+
+def book_key(book_id: int) -> str:
+    return f"book:{book_id}"
+
+
+def author_key(author_id: int) -> str:
+    return f"author:{author_id}"
+
+
+def author_tag(author_id: int) -> str:
+    return f"author:{author_id}"
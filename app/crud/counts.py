@@ -0,0 +1,46 @@
+import json
+from sqlalchemy import func, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.core.config import settings
+from app.models import TableChange, TableVersion
+
+
+async def table_row_count(db: AsyncSession, table: str) -> int:
+    """Exact row count of ``table``: the folded count plus the deltas still in ``table_changes``."""
+    pending = select(func.coalesce(func.sum(TableChange.row_delta), 0)).where(TableChange.table_name == table)
+    result = await db.execute(
+        select(TableVersion.row_count + pending.scalar_subquery()).where(TableVersion.table_name == table)
+    )
+    return result.scalar_one_or_none() or 0
+
+
+async def estimate_row_count(db: AsyncSession, query) -> int:
+    # The planner's row estimate, from table statistics, without running the query. Filter
+    # values stay bound parameters rather than being rendered into the SQL.
+    compiled = query.compile(dialect=postgresql.dialect(paramstyle="named"),
+                             compile_kwargs={"render_postcompile": True})
+    result = await db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"), compiled.params)
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_query_rows(db: AsyncSession, query) -> int:
+    result = await db.execute(select(func.count()).select_from(query.order_by(None).subquery()))
+    return result.scalar_one()
+
+
+async def count_total(db: AsyncSession, query, mode: str) -> tuple[int, str]:
+    """``(total, "exact" | "estimated")`` for the rows ``query`` matches.
+
+    Estimates below ``TOTAL_COUNT_ESTIMATE_THRESHOLD`` are replaced by an exact count, which
+    is cheap at that size and where the planner's relative error is largest.
+    """
+    if mode == "estimated":
+        estimate = await estimate_row_count(db, query)
+        if estimate >= settings.TOTAL_COUNT_ESTIMATE_THRESHOLD:
+            return estimate, "estimated"
+    return await count_query_rows(db, query), "exact"
@@ -0,0 +1,58 @@
+import csv
+from io import StringIO
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.books import book_row_to_dict, build_book_filters, build_book_ordering, select_book_rows
+from app.models import Book
+from app.schemas.books import BookFilterParams
+from app.utils.serialization import dumps
+
+EXPORT_FETCH_SIZE = 1000
+CSV_FIELDNAMES = ["id", "title", "author", "genre", "published_year"]
+
+
+def book_export_query(filter_params: BookFilterParams):
+    filters = build_book_filters(
+        title=filter_params.title,
+        author_name=filter_params.author_name,
+        genre=filter_params.genre,
+        year_from=filter_params.year_from,
+        year_to=filter_params.year_to,
+    )
+
+    ordering = build_book_ordering(filter_params.sort_by, filter_params.sort_order)
+
+    return select_book_rows().where(*filters).order_by(*ordering, Book.id)
+
+
+async def stream_book_rows(db: AsyncSession, query, fetch_size: int = EXPORT_FETCH_SIZE):
+    result = await db.stream(query.execution_options(yield_per=fetch_size))
+    async for rows in result.partitions():
+        yield rows
+
+
+async def iter_books_json(db: AsyncSession, query, fetch_size: int = EXPORT_FETCH_SIZE):
+    prefix = b"["
+    async for rows in stream_book_rows(db, query, fetch_size):
+        yield prefix + b",".join(dumps(book_row_to_dict(row)) for row in rows)
+        prefix = b","
+    yield b"[]" if prefix == b"[" else b"]"
+
+
+async def iter_books_ndjson(db: AsyncSession, query, fetch_size: int = EXPORT_FETCH_SIZE):
+    async for rows in stream_book_rows(db, query, fetch_size):
+        yield b"".join(dumps(book_row_to_dict(row)) + b"\n" for row in rows)
+
+
+async def iter_books_csv(db: AsyncSession, query, fetch_size: int = EXPORT_FETCH_SIZE):
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_FIELDNAMES)
+
+    async for rows in stream_book_rows(db, query, fetch_size):
+        writer.writerows((row.id, row.title, row.name, row.genre, row.published_year) for row in rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue().encode()
@@ -0,0 +1,133 @@
+import time
+from itertools import islice
+from typing import Iterable
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.models import Author, Book
+
+CHUNK_SIZE = 5000
+
+
+class BulkImporter:
+    """Set-based writer for catalogue imports.
+
+    Rows are dicts with ``author_name``, ``title``, ``genre`` and ``published_year``.
+    A row without a ``title`` only makes sure its author exists. Unless ``strict``,
+    malformed rows are counted in ``failed_rows`` instead of aborting the import.
+    """
+
+    def __init__(self, db: AsyncSession, chunk_size: int = CHUNK_SIZE, strict: bool = True):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.strict = strict
+        self.author_id_map = {}
+        self.imported_authors = 0
+        self.imported_books = 0
+        self.skipped_books = 0
+        self.failed_rows = 0
+        self.rows_processed = 0
+        self.started_at = time.perf_counter()
+
+    async def import_rows(self, rows: Iterable[dict]):
+        rows = iter(rows)
+        while chunk := list(islice(rows, self.chunk_size)):
+            await self._import_chunk(chunk)
+
+    @staticmethod
+    def _required(row: dict, field: str):
+        value = row.get(field)
+        if value is None or (isinstance(value, str) and not value.strip()):
+            raise ValueError(f"{field} is required")
+        return value
+
+    def _normalize(self, row: dict):
+        # Every column a book needs is checked here, so a bad row is counted in
+        # ``failed_rows`` instead of failing the INSERT for the whole chunk.
+        author_name = self._required(row, "author_name")
+        title = row.get("title")
+        if title is None or (isinstance(title, str) and not title.strip()):
+            return author_name, None
+        return author_name, {
+            "title": title,
+            "genre": self._required(row, "genre"),
+            "published_year": int(self._required(row, "published_year")),
+        }
+
+    async def _import_chunk(self, rows: list[dict]):
+        normalized = []
+        for row in rows:
+            try:
+                normalized.append(self._normalize(row))
+            except (KeyError, TypeError, ValueError):
+                if self.strict:
+                    raise
+                self.failed_rows += 1
+
+        await self._resolve_authors({author_name for author_name, _ in normalized})
+
+        books = []
+        for author_name, book in normalized:
+            if book is not None:
+                book["author_id"] = self.author_id_map[author_name]
+                books.append(book)
+
+        if books:
+            # Titles already in the catalogue, or repeated in the chunk, are skipped by the
+            # unique title constraint rather than looked up first.
+            result = await self.db.execute(
+                pg_insert(Book)
+                .values(books)
+                .on_conflict_do_nothing(index_elements=[Book.title])
+                .returning(Book.id)
+            )
+            imported = len(result.scalars().all())
+            self.imported_books += imported
+            self.skipped_books += len(books) - imported
+
+        self.rows_processed += len(rows)
+
+    async def _resolve_authors(self, names: set[str]):
+        missing = [name for name in names if name not in self.author_id_map]
+        if not missing:
+            return
+
+        result = await self.db.execute(select(Author.id, Author.name).where(Author.name.in_(missing)))
+        for author_id, name in result.tuples():
+            self.author_id_map[name] = author_id
+
+        missing = [name for name in missing if name not in self.author_id_map]
+        if not missing:
+            return
+
+        result = await self.db.execute(
+            pg_insert(Author)
+            .values([{"name": name} for name in missing])
+            .on_conflict_do_nothing(index_elements=[Author.name])
+            .returning(Author.id, Author.name)
+        )
+        for author_id, name in result.tuples():
+            self.author_id_map[name] = author_id
+            self.imported_authors += 1
+
+        # Authors inserted by a concurrent import in the meantime.
+        missing = [name for name in missing if name not in self.author_id_map]
+        if missing:
+            result = await self.db.execute(select(Author.id, Author.name).where(Author.name.in_(missing)))
+            for author_id, name in result.tuples():
+                self.author_id_map[name] = author_id
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = time.perf_counter() - self.started_at
+        return round(self.rows_processed / elapsed, 2) if elapsed > 0 else 0.0
+
+    def progress(self) -> dict:
+        return {
+            "rows_processed": self.rows_processed,
+            "rows_per_second": self.rows_per_second,
+            "imported_authors": self.imported_authors,
+            "imported_books": self.imported_books,
+            "skipped_books": self.skipped_books,
+            "failed_rows": self.failed_rows,
+        }
@@ -0,0 +1,195 @@
+import random
+import time
+from array import array
+from collections import OrderedDict
+from fastapi import HTTPException
+from sqlalchemy import BigInteger, and_, cast, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from typing import Optional
+from app.core.config import settings
+from app.crud.books import build_book_filters, select_books_with_authors
+from app.database import is_replica_session
+from app.models import Book, Author
+from app.schemas.books import BookSchema
+from app.utils.events import on_change
+
+MISSING = object()
+
+
+class RecommendationPools:
+    """Per-process cache of the book ids matching each recommendation filter.
+
+    Pools expire after ``ttl`` seconds and are all dropped on any committed write to books or
+    authors. A filter matching more than ``max_pool_size`` books is cached as ``None`` so the
+    caller falls back to picking in the database, and is remembered across invalidations so
+    the next load counts its matches before reading their ids. Only the ``max_pools`` most
+    recently used filters are kept.
+    """
+
+    def __init__(self, ttl: int, max_pools: int, max_pool_size: int):
+        self.ttl = ttl
+        self.max_pools = max_pools
+        self.max_pool_size = max_pool_size
+        self.pools = OrderedDict()
+        self.oversized = OrderedDict()
+        self.genres = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(genre: Optional[str] = None, author_name: Optional[str] = None):
+        # Filters are case-insensitive substring matches.
+        return (genre or "").lower(), (author_name or "").lower()
+
+    def _lookup(self, entry):
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return entry[1]
+        self.misses += 1
+        return MISSING
+
+    def get(self, key):
+        ids = self._lookup(self.pools.get(key))
+        if ids is MISSING:
+            self.pools.pop(key, None)
+        else:
+            self.pools.move_to_end(key)
+        return ids
+
+    def put(self, key, ids: Optional[array]):
+        self.pools[key] = (time.monotonic() + self.ttl, ids)
+        self.pools.move_to_end(key)
+        while len(self.pools) > self.max_pools:
+            self.pools.popitem(last=False)
+        if ids is None:
+            self.oversized[key] = True
+            self.oversized.move_to_end(key)
+            while len(self.oversized) > self.max_pools:
+                self.oversized.popitem(last=False)
+        else:
+            self.oversized.pop(key, None)
+
+    def was_oversized(self, key) -> bool:
+        return key in self.oversized
+
+    def get_genres(self):
+        return self._lookup(self.genres)
+
+    def put_genres(self, genres: list[str]):
+        self.genres = (time.monotonic() + self.ttl, genres)
+
+    def discard(self, key):
+        self.pools.pop(key, None)
+
+    def clear(self, table: Optional[str] = None):
+        self.pools.clear()
+        self.genres = None
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "pools": len(self.pools),
+            "pooled_ids": sum(len(ids) for _, ids in self.pools.values() if ids is not None),
+            "oversized": len(self.oversized),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+
+recommendation_pools = RecommendationPools(
+    ttl=settings.RECOMMEND_CACHE_TTL,
+    max_pools=settings.RECOMMEND_MAX_POOLS,
+    max_pool_size=settings.RECOMMEND_POOL_MAX_SIZE,
+)
+on_change("books", "authors")(recommendation_pools.clear)
+
+
+def book_filter_clause(genre: Optional[str] = None, author_name: Optional[str] = None):
+    filters = build_book_filters(genre=genre, author_name=author_name)
+    return and_(*filters) if filters else True
+
+
+def random_book_query(genre: Optional[str] = None, author_name: Optional[str] = None):
+    # Counting and skipping to a random offset both happen in Postgres, so only the picked row
+    # is sent back, whatever the size of the matching set.
+    where = book_filter_clause(genre=genre, author_name=author_name)
+
+    matching = select(func.count(Book.id)).join(Book.author).where(where)
+    offset = cast(func.floor(func.random() * matching.scalar_subquery()), BigInteger)
+
+    return select_books_with_authors().where(where).order_by(Book.id).offset(offset).limit(1)
+
+
+async def load_book_id_pool(db: AsyncSession, genre: Optional[str] = None, author_name: Optional[str] = None):
+    limit = recommendation_pools.max_pool_size
+    matching = (
+        select(Book.id).join(Book.author).where(book_filter_clause(genre=genre, author_name=author_name))
+        .limit(limit + 1)
+    )
+    # A filter that was too large to pool most likely still is, so count its matches in
+    # Postgres before sending every id back.
+    if recommendation_pools.was_oversized(recommendation_pools.key(genre=genre, author_name=author_name)):
+        matches = await db.scalar(select(func.count()).select_from(matching.subquery()))
+        if matches > limit:
+            return None
+
+    result = await db.execute(matching)
+    ids = array("q", result.scalars().all())
+    return ids if len(ids) <= limit else None
+
+
+async def get_genres(db: AsyncSession) -> list[str]:
+    genres = recommendation_pools.get_genres()
+    if genres is MISSING:
+        result = await db.execute(select(Book.genre).distinct())
+        genres = [genre for genre in result.scalars().all()]
+        if not is_replica_session(db):
+            recommendation_pools.put_genres(genres)
+    return genres
+
+
+async def raise_no_recommendation(db: AsyncSession, author_name: Optional[str] = None):
+    if author_name:
+        result = await db.execute(select(Author.id).filter(Author.name.ilike(f"%{author_name}%")).limit(1))
+        if result.first() is None:
+            raise HTTPException(status_code=404, detail="No authors found matching the provided name")
+
+    genres = await get_genres(db)
+    raise HTTPException(
+        status_code=404,
+        detail=f"No books found. Available genres: {', '.join(genres)}"
+    )
+
+
+async def get_random_book(db: AsyncSession, genre: Optional[str] = None, author_name: Optional[str] = None):
+    key = recommendation_pools.key(genre=genre, author_name=author_name)
+    ids = recommendation_pools.get(key)
+    if ids is MISSING:
+        ids = await load_book_id_pool(db, genre=genre, author_name=author_name)
+        # Pools read from a replica may lag the primary, so they aren't kept. A filter too
+        # large to pool only makes callers pick in the database, so that is kept either way.
+        if ids is None or not is_replica_session(db):
+            recommendation_pools.put(key, ids)
+
+    book = None
+    if ids:
+        result = await db.execute(select_books_with_authors().where(Book.id == random.choice(ids)))
+        book = result.scalars().first()
+        if book is None:
+            # Deleted by another worker since the pool was loaded.
+            recommendation_pools.discard(key)
+
+    if book is None and (ids is None or len(ids) > 0):
+        # Either too many matches to pool, or the pool is stale.
+        result = await db.execute(random_book_query(genre=genre, author_name=author_name))
+        book = result.scalars().first()
+
+    if not book:
+        await raise_no_recommendation(db, author_name=author_name)
+
+    return BookSchema.from_orm(book)
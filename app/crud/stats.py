@@ -0,0 +1,70 @@
+from sqlalchemy import BigInteger, cast, desc, func, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.models import Author, BookCountByAuthor, BookCountByDecade, BookCountByGenre, BookCountDelta
+from app.schemas.stats import AuthorCount, CatalogueStats, DecadeCount, GenreCount
+
+# The count tables plus the deltas not rolled up yet give exact counts, so every read here is
+# proportional to the number of groups and recent writes, not the number of books.
+
+
+def book_counts(group, books, pending_group):
+    """``(key, books)`` per group with books: the rolled-up count plus its pending deltas."""
+    rows = union_all(
+        select(group.label("key"), books.label("books")),
+        select(pending_group.label("key"), BookCountDelta.books),
+    ).subquery()
+    total = func.sum(rows.c.books)
+    return (
+        select(rows.c.key, cast(total, BigInteger).label("books"))
+        .group_by(rows.c.key)
+        .having(total > 0)
+        .subquery()
+    )
+
+
+def genre_counts():
+    return book_counts(BookCountByGenre.genre, BookCountByGenre.books, BookCountDelta.genre)
+
+
+def author_counts():
+    return book_counts(BookCountByAuthor.author_id, BookCountByAuthor.books, BookCountDelta.author_id)
+
+
+def decade_counts():
+    return book_counts(BookCountByDecade.decade, BookCountByDecade.books, BookCountDelta.decade)
+
+
+async def get_genre_counts(db: AsyncSession) -> list[GenreCount]:
+    counts = genre_counts()
+    result = await db.execute(select(counts.c.key, counts.c.books).order_by(desc(counts.c.books), counts.c.key))
+    return [GenreCount(genre=genre, books=books) for genre, books in result.tuples()]
+
+
+async def get_decade_counts(db: AsyncSession) -> list[DecadeCount]:
+    counts = decade_counts()
+    result = await db.execute(select(counts.c.key, counts.c.books).order_by(counts.c.key))
+    return [DecadeCount(decade=decade, books=books) for decade, books in result.tuples()]
+
+
+async def get_author_counts(db: AsyncSession, skip: int = 0, limit: int = 100) -> list[AuthorCount]:
+    counts = author_counts()
+    result = await db.execute(
+        select(counts.c.key, Author.name, counts.c.books)
+        .join(Author, Author.id == counts.c.key)
+        .order_by(desc(counts.c.books), counts.c.key)
+        .offset(skip)
+        .limit(limit)
+    )
+    return [AuthorCount(author_id=author_id, name=name, books=books) for author_id, name, books in result.tuples()]
+
+
+async def get_catalogue_stats(db: AsyncSession) -> CatalogueStats:
+    genres = await get_genre_counts(db)
+    result = await db.execute(select(func.count()).select_from(author_counts()))
+    return CatalogueStats(
+        books=sum(genre.books for genre in genres),
+        authors_with_books=result.scalar_one(),
+        genres=genres,
+        decades=await get_decade_counts(db),
+    )
@@ -1,19 +1,260 @@
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+import asyncio
+import itertools
+import logging
+import time
+from fastapi import Request
+from sqlalchemy import event, exc, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from dotenv import load_dotenv
-import os
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.config import settings
 
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-DATABASE_URL = os.getenv("DATABASE_URL")
-engine = create_async_engine(DATABASE_URL, echo=True)
+DATABASE_URL = settings.DATABASE_URL
+
+
+class PoolWaitStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def record(self, waited: float):
+        self.checkouts += 1
+        self.wait_seconds += waited
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool timing how long each checkout waits, including connecting when it grows.
+
+    Each engine's pool keeps its own stats, carried over when the pool is recreated on dispose.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.timeouts += 1
+            raise
+        finally:
+            self.wait_stats.record(time.perf_counter() - started)
+
+
+def engine_options(url: str) -> dict:
+    options = {
+        "echo": {"true": True, "debug": "debug"}.get(settings.DB_ECHO, False),
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if url and url.startswith("postgresql+asyncpg"):
+        options["connect_args"] = {"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+    return options
+
+
+engine = create_async_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+
+
+def pool_status(target: AsyncEngine = engine) -> dict:
+    pool = target.sync_engine.pool
+    wait_stats = pool.wait_stats
+    checkouts = wait_stats.checkouts
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checkouts": checkouts,
+        "avg_wait_ms": round(wait_stats.wait_seconds / checkouts * 1000, 3) if checkouts else 0.0,
+        "max_wait_ms": round(wait_stats.max_wait_seconds * 1000, 3),
+        "timeouts": wait_stats.timeouts,
+    }
 
 AsyncSessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
 Base = declarative_base()
 
+UNIQUE_VIOLATION = "23505"
+FOREIGN_KEY_VIOLATION = "23503"
+
+
+def violated_constraint(error: exc.IntegrityError) -> tuple[str, str]:
+    """``(sqlstate, constraint name)`` of the Postgres error behind ``error``."""
+    orig = error.orig
+    return getattr(orig, "sqlstate", None), getattr(orig.__cause__, "constraint_name", None)
+
+
+class ReplicaRouter:
+    """Pick the engine for read-only sessions among ``replicas``, falling back to ``primary``.
+
+    ``round_robin`` cycles through the healthy replicas and ``least_load`` picks the one with the
+    fewest checked-out connections. A replica that drops a connection or fails the periodic
+    ``SELECT 1`` is skipped until a later check succeeds; with none left, reads go to primary.
+    """
+
+    def __init__(self, primary: AsyncEngine, replicas: list[AsyncEngine], strategy: str = "round_robin",
+                 health_check_interval: float = 10.0, health_check_timeout: float = 2.0):
+        self.primary = primary
+        self.replicas = replicas
+        self.strategy = strategy
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.healthy = list(replicas)
+        self.turn = itertools.count()
+        self.task = None
+        self.fallbacks = 0
+        for replica in replicas:
+            event.listen(replica.sync_engine, "handle_error", self._on_error)
+
+    def pick(self) -> AsyncEngine:
+        healthy = self.healthy
+        if not healthy:
+            if self.replicas:
+                self.fallbacks += 1
+            return self.primary
+        if self.strategy == "least_load":
+            return min(healthy, key=lambda replica: replica.sync_engine.pool.checkedout())
+        return healthy[next(self.turn) % len(healthy)]
+
+    def session(self) -> AsyncSession:
+        engine = self.pick()
+        return AsyncSession(bind=engine, expire_on_commit=False, info={"replica": engine is not self.primary})
+
+    async def check_health(self):
+        healthy = []
+        for replica in self.replicas:
+            try:
+                async with replica.connect() as conn:
+                    await asyncio.wait_for(conn.execute(text("SELECT 1")), self.health_check_timeout)
+            except Exception as e:
+                logger.warning("Read replica %s failed its health check: %s", replica.url, e)
+            else:
+                healthy.append(replica)
+        self.healthy = healthy
+
+    def _on_error(self, context):
+        if context.is_disconnect:
+            self.healthy = [replica for replica in self.healthy if replica.sync_engine is not context.engine]
+
+    async def _run_health_checks(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            await self.check_health()
+
+    def start(self):
+        if self.replicas and self.task is None:
+            self.task = asyncio.create_task(self._run_health_checks())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+            self.task = None
+
+    def stats(self) -> dict:
+        return {
+            "replicas": len(self.replicas),
+            "healthy": len(self.healthy),
+            "strategy": self.strategy,
+            "primary_fallbacks": self.fallbacks,
+            "pools": [
+                {"url": replica.url.render_as_string(hide_password=True), **pool_status(replica)}
+                for replica in self.replicas
+            ],
+        }
+
+
+replica_router = ReplicaRouter(
+    engine,
+    [create_async_engine(url, **engine_options(url)) for url in settings.DATABASE_REPLICA_URLS],
+    strategy=settings.REPLICA_STRATEGY,
+    health_check_interval=settings.REPLICA_HEALTH_CHECK_INTERVAL,
+)
+
+READ_PRIMARY_COOKIE = "read_primary_until"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class DBSessionMiddleware:
+    """Close the request's sessions, if any were opened, once the response body has been sent.
+
+    Streaming responses run inside the wrapped app, so they can keep using their session. After
+    a write, the response sets a short-lived cookie sending that client's reads to the primary,
+    so it reads its own writes even while replicas lag behind.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        state = scope.setdefault("state", {})
+
+        async def send_with_cookie(message):
+            if (message["type"] == "http.response.start" and replica_router.replicas
+                    and scope["method"] not in SAFE_METHODS and "db" in state):
+                window = settings.READ_PRIMARY_WINDOW
+                cookie = f"{READ_PRIMARY_COOKIE}={time.time() + window:.0f}; Max-Age={window}; Path=/; HttpOnly"
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_cookie)
+        finally:
+            for key in ("db", "read_db"):
+                session = state.pop(key, None)
+                if session is not None:
+                    await session.close()
+
+
+async def get_db(request: Request) -> AsyncSession:
+    # One session per request, shared by every dependency. It only checks out a pool connection
+    # on its first statement. Routes commit their own writes; anything left is rolled back on close.
+    session = getattr(request.state, "db", None)
+    if session is None:
+        session = request.state.db = AsyncSessionLocal()
+    return session
+
+
+def reads_from_primary(request: Request) -> bool:
+    if getattr(request.state, "db", None) is not None:
+        return True
+    try:
+        return float(request.cookies.get(READ_PRIMARY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def is_replica_session(db: AsyncSession) -> bool:
+    """Whether ``db`` reads from a replica, whose results may lag the primary and so must not
+    be stored in caches shared with primary readers."""
+    return db.info.get("replica", False)
+
 
-async def get_db():
-    async with AsyncSessionLocal() as session:
-        yield session
-        await session.commit()
+async def get_read_db(request: Request) -> AsyncSession:
+    """Session for read-only routes: a replica, unless this request or client must see the primary."""
+    if reads_from_primary(request):
+        return await get_db(request)
+    session = getattr(request.state, "read_db", None)
+    if session is None:
+        session = request.state.read_db = replica_router.session()
+    return session
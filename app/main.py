@@ -3,14 +3,16 @@ from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 from starlette.middleware.cors import CORSMiddleware
-from app.routers import authors, books, imports, auth, exports, recommend
-from app.database import AsyncSessionLocal
+from app.routers import authors, books, imports, auth, exports, metrics, recommend, stats
+from app.database import AsyncSessionLocal, DBSessionMiddleware, replica_router
 from app.models import User
-from passlib.context import CryptContext
+from app.core.config import settings
+from app.utils.jobs import import_workers
+from app.utils.passwords import password_hasher
+from app.utils.rate_limit import RateLimit, RateLimitMiddleware, create_rate_limit_backend
+from app.utils.rollups import rollups
 from sqlalchemy.future import select
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 
 async def create_test_user():
     async with AsyncSessionLocal() as db:
@@ -18,7 +20,7 @@ async def create_test_user():
         user = result.scalars().first()
 
         if not user:
-            hashed_password = bcrypt_context.hash("test_password")
+            hashed_password = await password_hasher.hash("test_password")
             new_user = User(username="test_user", hashed_password=hashed_password)
             db.add(new_user)
             await db.commit()
@@ -29,7 +31,30 @@ app = FastAPI(
     title="Book Management System",
     description="API Books Management",
     version="1.0.0",
-    on_startup=[create_test_user]
+    on_startup=[create_test_user, replica_router.start, rollups.start],
+    on_shutdown=[import_workers.stop, replica_router.stop, rollups.stop, password_hasher.stop]
+)
+
+app.add_middleware(DBSessionMiddleware)
+
+api_limit = RateLimit("api", settings.RATE_LIMIT_REQUESTS, settings.RATE_LIMIT_WINDOW)
+import_limit = RateLimit("imports", settings.IMPORT_RATE_LIMIT_REQUESTS, settings.RATE_LIMIT_WINDOW)
+export_limit = RateLimit("exports", settings.EXPORT_RATE_LIMIT_REQUESTS, settings.RATE_LIMIT_WINDOW)
+
+# First match wins; auth, docs and the root path aren't limited.
+app.add_middleware(
+    RateLimitMiddleware,
+    backend=create_rate_limit_backend(),
+    rules=[
+        ("POST", "/api/imports", import_limit),
+        (None, "/api/exports", export_limit),
+        (None, "/api/imports", api_limit),
+        (None, "/api/books", api_limit),
+        (None, "/api/authors", api_limit),
+        (None, "/api/recommend", api_limit),
+        (None, "/api/metrics", api_limit),
+        (None, "/api/stats", api_limit),
+    ],
 )
 
 app.add_middleware(
@@ -38,22 +63,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "X-Total-Count", "X-Total-Count-Type"],
 )
 
-
-@app.middleware("http")
-async def db_session_middleware(request, call_next):
-    async with AsyncSessionLocal() as session:
-        request.state.db = session
-        response = await call_next(request)
-    return response
-
 app.include_router(authors.router, prefix="/api/authors", tags=["Authors"])
 app.include_router(recommend.router, prefix="/api/recommend", tags=["Recommend"])
 app.include_router(books.router, prefix="/api/books", tags=["Books"])
 app.include_router(imports.router, prefix="/api/imports", tags=["Import"])
 app.include_router(auth.router, prefix="/api", tags=["auth"])
 app.include_router(exports.router, prefix="/api/exports", tags=["exports"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["Metrics"])
+app.include_router(stats.router, prefix="/api/stats", tags=["Stats"])
 
 
 @app.exception_handler(RequestValidationError)
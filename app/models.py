@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import (BigInteger, Column, DateTime, Identity, Integer, String, ForeignKey, Index, UniqueConstraint,
+                        text)
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -11,18 +12,28 @@ class Author(Base):
 
     books = relationship("Book", back_populates="author")
 
+    __table_args__ = (
+        Index("ix_authors_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+    )
+
 
 class Book(Base):
     __tablename__ = "books"
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
-    genre = Column(String, nullable=False)
-    published_year = Column(Integer, nullable=False)
-    author_id = Column(Integer, ForeignKey("authors.id"), nullable=False)
+    genre = Column(String, nullable=False, index=True)
+    published_year = Column(Integer, nullable=False, index=True)
+    author_id = Column(Integer, ForeignKey("authors.id"), nullable=False, index=True)
 
     author = relationship("Author", back_populates="books")
 
+    __table_args__ = (
+        UniqueConstraint("title", name="uq_books_title"),
+        Index("ix_books_title_trgm", "title", postgresql_using="gin", postgresql_ops={"title": "gin_trgm_ops"}),
+        Index("ix_books_genre_trgm", "genre", postgresql_using="gin", postgresql_ops={"genre": "gin_trgm_ops"}),
+    )
+
 
 class User(Base):
     __tablename__ = "users"
@@ -30,3 +41,61 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String, unique=True, index=True)
     hashed_password = Column(String)
+
+
+class TableVersion(Base):
+    """Change counter, row count and last change time per table, excluding the changes still
+    pending in ``table_changes``."""
+    __tablename__ = "table_versions"
+
+    table_name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, server_default="0")
+    row_count = Column(BigInteger, nullable=False, server_default="0")
+    updated_at = Column(DateTime(timezone=True), nullable=False, server_default=text("now()"))
+
+
+class TableChange(Base):
+    """One row per write statement with the rows it added or removed, appended by the
+    ``<table>_log_*`` triggers and folded into ``table_versions`` by ``compact_table_changes()``."""
+    __tablename__ = "table_changes"
+
+    id = Column(BigInteger, Identity(always=True), primary_key=True)
+    table_name = Column(String, nullable=False, index=True)
+    row_delta = Column(BigInteger, nullable=False, server_default="0")
+    changed_at = Column(DateTime(timezone=True), nullable=False, server_default=text("clock_timestamp()"))
+
+
+class BookCountByGenre(Base):
+    """Books per genre, excluding the deltas still pending in ``book_count_deltas``."""
+    __tablename__ = "book_counts_by_genre"
+
+    genre = Column(String, primary_key=True)
+    books = Column(BigInteger, nullable=False)
+
+
+class BookCountByAuthor(Base):
+    """Books per author, excluding the deltas still pending in ``book_count_deltas``."""
+    __tablename__ = "book_counts_by_author"
+
+    author_id = Column(Integer, primary_key=True)
+    books = Column(BigInteger, nullable=False)
+
+
+class BookCountByDecade(Base):
+    """Books per publication decade, excluding the deltas still pending in ``book_count_deltas``."""
+    __tablename__ = "book_counts_by_decade"
+
+    decade = Column(Integer, primary_key=True)
+    books = Column(BigInteger, nullable=False)
+
+
+class BookCountDelta(Base):
+    """Grouped book count changes appended by the ``books_count_*`` triggers and folded into
+    the ``book_counts_by_*`` tables by ``roll_up_book_counts()``."""
+    __tablename__ = "book_count_deltas"
+
+    id = Column(BigInteger, Identity(always=True), primary_key=True)
+    genre = Column(String, nullable=False)
+    author_id = Column(Integer, nullable=False)
+    decade = Column(Integer, nullable=False)
+    books = Column(BigInteger, nullable=False)
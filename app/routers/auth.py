@@ -4,33 +4,23 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from starlette import status
-from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
-from jose import jwt, JWTError
 
-from app.database import AsyncSessionLocal
+from app.database import get_db
 from app.models import User
-from app.core.config import settings
 from app.schemas.users import CreateUser, Token
+from app.utils.passwords import password_hasher
+from app.utils.tokens import TokenError, token_verifier
 
 
-SECRET_KEY = settings.SECRET_KEY
-ALGORITHM = "HS256"
-
 router = APIRouter(
     prefix="/auth",
     tags=["auth"]
 )
 
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl="api/auth/token")
 
 
-async def get_db():
-    async with AsyncSessionLocal() as db:
-        yield db
-
-
 db_dependency = Annotated[AsyncSession, Depends(get_db)]
 
 
@@ -49,7 +39,7 @@ async def create_user(db: db_dependency, create_user_request: CreateUser):
 
     create_user_model = User(
         username=create_user_request.username,
-        hashed_password=bcrypt_context.hash(create_user_request.password)
+        hashed_password=await password_hasher.hash(create_user_request.password)
     )
 
     db.add(create_user_model)
@@ -75,7 +65,7 @@ async def authenticate_user(username: str, password: str, db: AsyncSession):
 
     if not user:
         return False
-    if not bcrypt_context.verify(password, user.hashed_password):
+    if not await password_hasher.verify(username, password, user.hashed_password):
         return False
     return user
 
@@ -84,16 +74,16 @@ def create_access_token(username: str, user_id: int, expires_delta: timedelta):
     encode = {'sub': username, 'id': user_id}
     expires = datetime.utcnow() + expires_delta
     encode.update({'exp': expires})
-    return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
+    return token_verifier.encode(encode)
 
 
 async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = token_verifier.verify(token)
         username: str = payload.get("sub")
         user_id: int = payload.get("id")
         if username is None or user_id is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
         return {'username': username, 'id': user_id}
-    except JWTError:
+    except TokenError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication credentials")
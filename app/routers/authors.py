@@ -1,54 +1,61 @@
-from typing import Annotated
-from fastapi import APIRouter, Depends, Request
+from typing import Annotated, Optional, Union
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.schemas.authors import (AuthorSchema,
                                  AuthorCreate,
-                                 AuthorDeleteResponse)
-from app.crud.authors import (create_author,
+                                 AuthorDeleteResponse,
+                                 AuthorPage)
+from app.crud.authors import (count_authors,
+                              create_author,
                               get_author_by_id,
                               get_authors_list,
+                              get_authors_page,
                               update_author_by_id,
                               delete_author_by_id)
-from app.database import get_db
+from app.core.config import settings
+from app.database import get_db, get_read_db
 from app.routers.auth import get_current_user
-from app.utils.rate_limit import rate_limit
+from app.utils.conditional import conditional_get
 
 router = APIRouter()
 user_dependency = Annotated[dict, Depends(get_current_user)]
+authors_not_modified = conditional_get("authors", cache_control=settings.CACHE_CONTROL_AUTHORS)
 
 
 @router.post("/", response_model=AuthorSchema)
-async def create_author_route(user: user_dependency, author: AuthorCreate, request: Request, db: AsyncSession = Depends(get_db)):
-    user_ip = request.client.host
-    rate_limit(user_ip=user_ip)
+async def create_author_route(user: user_dependency, author: AuthorCreate, db: AsyncSession = Depends(get_db)):
     return await create_author(db=db, name=author.name)
 
 
-@router.get("/", response_model=list[AuthorSchema])
-async def get_authors(request: Request, skip: int = 0, limit: int = 10, db: AsyncSession = Depends(get_db)):
-    user_ip = request.client.host
-    rate_limit(user_ip=user_ip)
+@router.get("/", response_model=Union[list[AuthorSchema], AuthorPage], dependencies=[Depends(authors_not_modified)])
+async def get_authors(response: Response, skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=1000),
+                      pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+                      cursor: Optional[str] = None,
+                      total: Optional[str] = Query(None, pattern="^(exact|estimated)$"),
+                      db: AsyncSession = Depends(get_read_db)):
+    if total is not None:
+        count, kind = await count_authors(db=db)
+        response.headers.update({"X-Total-Count": str(count), "X-Total-Count-Type": kind})
+    if pagination == "cursor" or cursor is not None:
+        return await get_authors_page(db=db, limit=limit, cursor=cursor)
     authors = await get_authors_list(db=db, skip=skip, limit=limit)
     return authors
 
 
 @router.get("/{author_id}", response_model=AuthorSchema)
-async def get_author_route(author_id: int, request: Request, db: AsyncSession = Depends(get_db)):
-    user_ip = request.client.host
-    rate_limit(user_ip=user_ip)
-    author = await get_author_by_id(db=db, author_id=author_id)
+async def get_author_route(author_id: int, validators: dict = Depends(authors_not_modified),
+                           db: AsyncSession = Depends(get_read_db)):
+    # Cached entries are tied to the catalogue version, so another process's write isn't
+    # answered with this process's copy under the new ETag.
+    author = await get_author_by_id(db=db, author_id=author_id, version=validators.get("ETag"))
     return author
 
 
 @router.put("/{author_id}", response_model=AuthorSchema)
-async def update_author_route(user: user_dependency, author_id: int, author: AuthorCreate, request: Request, db: AsyncSession = Depends(get_db)):
-    user_ip = request.client.host
-    rate_limit(user_ip=user_ip)
+async def update_author_route(user: user_dependency, author_id: int, author: AuthorCreate, db: AsyncSession = Depends(get_db)):
     return await update_author_by_id(db=db, author_id=author_id, name=author.name)
 
 
 @router.delete("/{author_id}", response_model=AuthorDeleteResponse)
-async def delete_author_route(user: user_dependency, author_id: int, request: Request, db: AsyncSession = Depends(get_db)):
-    user_ip = request.client.host
-    rate_limit(user_ip=user_ip)
+async def delete_author_route(user: user_dependency, author_id: int, db: AsyncSession = Depends(get_db)):
     return await delete_author_by_id(db=db, author_id=author_id)
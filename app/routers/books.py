@@ -1,74 +1,150 @@
-from typing import Annotated
-from fastapi import APIRouter, Depends, Request
+from typing import Annotated, Optional, Union
+from fastapi import APIRouter, Depends, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.routers.auth import get_current_user
 from app.schemas.books import (BookSchema,
                                BookCreate,
                                BookUpdate,
+                               BookPatch,
+                               BookBulkDelete,
+                               BookBulkResponse,
                                BookDeleteResponse,
-                               BookFilterParams)
-from app.crud.books import (create_book,
+                               BookFilterParams,
+                               BookPage)
+from app.crud.bulk_books import bulk_create_books, bulk_delete_books, bulk_patch_books, bulk_upsert_books
+from app.crud.cache import book_list_cache
+from app.crud.books import (book_list_cache_key,
+                            count_books,
+                            create_book,
                             get_book_by_id,
                             get_books_list,
+                            get_books_page,
                             update_book_by_id,
                             delete_book_by_id)
-from app.database import get_db
-from app.utils.rate_limit import rate_limit
+from app.core.config import settings
+from app.database import get_db, get_read_db, is_replica_session
+from app.utils.conditional import conditional_get
+from app.utils.serialization import FastJSONResponse, dumps
 
 router = APIRouter()
 user_dependency = Annotated[dict, Depends(get_current_user)]
+books_not_modified = conditional_get("books", "authors", cache_control=settings.CACHE_CONTROL_BOOKS)
 
 
 @router.post("/", response_model=BookSchema)
-async def create_book_view(user: user_dependency, book: BookCreate, request: Request, db: AsyncSession = Depends(get_db)):
-    user_ip = request.client.host
-    rate_limit(user_ip=user_ip)
+async def create_book_view(user: user_dependency, book: BookCreate, db: AsyncSession = Depends(get_db)):
     return await create_book(db=db, title=book.title, genre=book.genre,
                              published_year=book.published_year, author_id=book.author_id)
 
 
-@router.get("/", response_model=list[BookSchema])
+@router.get("/", response_model=Union[list[BookSchema], BookPage])
 async def get_books_view(
-        request: Request,
-        skip: int = 0,
-        limit: int = 10,
+        skip: int = Query(0, ge=0),
+        limit: int = Query(10, ge=1, le=1000),
+        pagination: str = Query("offset", pattern="^(offset|cursor)$"),
+        cursor: Optional[str] = None,
+        total: Optional[str] = Query(None, pattern="^(exact|estimated)$"),
         filter_params: BookFilterParams = Depends(),
-        db: AsyncSession = Depends(get_db),
+        validators: dict = Depends(books_not_modified),
+        db: AsyncSession = Depends(get_read_db),
 ):
-    user_ip = request.client.host
-    rate_limit(user_ip=user_ip)
-    return await get_books_list(
-        db=db,
-        skip=skip,
-        limit=limit,
-        title=filter_params.title,
-        author_name=filter_params.author_name,
-        genre=filter_params.genre,
-        year_from=filter_params.year_from,
-        year_to=filter_params.year_to,
-        sort_by=filter_params.sort_by,
-        sort_order=filter_params.sort_order,
-    )
+    async def load_books() -> bytes:
+        if pagination == "cursor" or cursor is not None:
+            page = await get_books_page(
+                db=db,
+                limit=limit,
+                cursor=cursor,
+                title=filter_params.title,
+                author_name=filter_params.author_name,
+                genre=filter_params.genre,
+                year_from=filter_params.year_from,
+                year_to=filter_params.year_to,
+                sort_by=filter_params.sort_by,
+                sort_order=filter_params.sort_order,
+            )
+            return dumps(page)
+
+        books = await get_books_list(
+            db=db,
+            skip=skip,
+            limit=limit,
+            title=filter_params.title,
+            author_name=filter_params.author_name,
+            genre=filter_params.genre,
+            year_from=filter_params.year_from,
+            year_to=filter_params.year_to,
+            sort_by=filter_params.sort_by,
+            sort_order=filter_params.sort_order,
+        )
+        return dumps(books)
+
+    # Rows are serialized straight to JSON bytes, and hits are sent as cached bytes. Pages read
+    # from a replica may lag the primary, so only primary reads fill the shared cache. Keys
+    # carry the ETag, so a write committed through another process never gets this process's
+    # older page sent under its new version.
+    store = not is_replica_session(db)
+    version = validators.get("ETag")
+    key = book_list_cache_key(filter_params, version=version, skip=skip, limit=limit, pagination=pagination,
+                              cursor=cursor)
+    content = await book_list_cache.get_or_load(key, load_books, store=store)
+
+    headers = dict(validators)
+    if total is not None:
+        async def load_total() -> bytes:
+            count, kind = await count_books(
+                db=db,
+                mode=total,
+                title=filter_params.title,
+                author_name=filter_params.author_name,
+                genre=filter_params.genre,
+                year_from=filter_params.year_from,
+                year_to=filter_params.year_to,
+            )
+            return f"{count} {kind}".encode()
+
+        # Totals share the result cache, so they're dropped on the same writes as the pages.
+        total_key = book_list_cache_key(filter_params, version=version, total=total)
+        count, kind = (await book_list_cache.get_or_load(total_key, load_total, store=store)).decode().split()
+        headers.update({"X-Total-Count": count, "X-Total-Count-Type": kind})
+
+    return Response(content=content, media_type="application/json", headers=headers)
+
+
+# Declared before the /{book_id} routes so "bulk" isn't parsed as a book id.
+@router.post("/bulk", response_model=BookBulkResponse)
+async def bulk_create_books_view(user: user_dependency, books: list[BookCreate], db: AsyncSession = Depends(get_db)):
+    return await bulk_create_books(db=db, books=books)
+
+
+@router.put("/bulk", response_model=BookBulkResponse)
+async def bulk_upsert_books_view(user: user_dependency, books: list[BookCreate], db: AsyncSession = Depends(get_db)):
+    return await bulk_upsert_books(db=db, books=books)
+
+
+@router.patch("/bulk", response_model=BookBulkResponse)
+async def bulk_patch_books_view(user: user_dependency, books: list[BookPatch], db: AsyncSession = Depends(get_db)):
+    return await bulk_patch_books(db=db, books=books)
+
+
+@router.post("/bulk/delete", response_model=BookBulkResponse)
+async def bulk_delete_books_view(user: user_dependency, request: BookBulkDelete, db: AsyncSession = Depends(get_db)):
+    return await bulk_delete_books(db=db, book_ids=request.ids)
 
 
 @router.get("/{book_id}", response_model=BookSchema)
-async def get_book_view(book_id: int, request: Request, db: AsyncSession = Depends(get_db)):
-    user_ip = request.client.host
-    rate_limit(user_ip=user_ip)
-    return await get_book_by_id(db=db, book_id=book_id)
+async def get_book_view(book_id: int, validators: dict = Depends(books_not_modified),
+                        db: AsyncSession = Depends(get_read_db)):
+    book = await get_book_by_id(db=db, book_id=book_id, version=validators.get("ETag"))
+    return FastJSONResponse(book, headers=validators)
 
 
 @router.put("/{book_id}", response_model=BookSchema)
-async def update_book_view(user: user_dependency, book_id: int, book: BookUpdate, request: Request, db: AsyncSession = Depends(get_db)):
-    user_ip = request.client.host
-    rate_limit(user_ip=user_ip)
+async def update_book_view(user: user_dependency, book_id: int, book: BookUpdate, db: AsyncSession = Depends(get_db)):
     return await update_book_by_id(db=db, book_id=book_id, title=book.title, genre=book.genre,
                                    published_year=book.published_year, author_id=book.author_id)
 
 
 @router.delete("/{book_id}", response_model=BookDeleteResponse)
-async def delete_book_view(user: user_dependency, book_id: int, request: Request, db: AsyncSession = Depends(get_db)):
-    user_ip = request.client.host
-    rate_limit(user_ip=user_ip)
+async def delete_book_view(user: user_dependency, book_id: int, db: AsyncSession = Depends(get_db)):
     return await delete_book_by_id(db=db, book_id=book_id)
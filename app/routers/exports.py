@@ -1,57 +1,47 @@
-import json
-import csv
-from httpx import Response
-from io import StringIO
-from fastapi import APIRouter, Depends, Response, Request
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-from sqlalchemy import select
 
-from app.database import get_db
-from app.models import Book
-from app.schemas.books import BookSchema
-from app.utils.rate_limit import rate_limit
+from app.crud.exports import (EXPORT_FETCH_SIZE,
+                              book_export_query,
+                              iter_books_csv,
+                              iter_books_json,
+                              iter_books_ndjson)
+from app.core.config import settings
+from app.database import get_read_db
+from app.schemas.books import BookFilterParams
+from app.utils.conditional import conditional_get
 
 router = APIRouter()
+export_not_modified = conditional_get("books", "authors", cache_control=settings.CACHE_CONTROL_EXPORTS)
 
 
 @router.get("/export/json")
-async def export_books_json(request: Request,db: AsyncSession = Depends(get_db)):
-    user_ip = request.client.host
-    rate_limit(user_ip=user_ip)
+async def export_books_json(
+        format: str = Query("json", pattern="^(json|ndjson)$"),
+        fetch_size: int = Query(EXPORT_FETCH_SIZE, ge=1, le=10000),
+        filter_params: BookFilterParams = Depends(),
+        validators: dict = Depends(export_not_modified),
+        db: AsyncSession = Depends(get_read_db),
+):
+    query = book_export_query(filter_params)
 
-    result = await db.execute(select(Book).options(selectinload(Book.author)))
-    books = result.scalars().all()
+    if format == "ndjson":
+        return StreamingResponse(iter_books_ndjson(db, query, fetch_size), media_type="application/x-ndjson",
+                                 headers={"Content-Disposition": "attachment; filename=books.ndjson", **validators})
 
-    books_data = [BookSchema.from_orm(book).dict() for book in books]
-    response = Response(content=json.dumps(books_data), media_type="application/json")
-    response.headers["Content-Disposition"] = "attachment; filename=books.json"
-
-    return response
+    return StreamingResponse(iter_books_json(db, query, fetch_size), media_type="application/json",
+                             headers={"Content-Disposition": "attachment; filename=books.json", **validators})
 
 
 @router.get("/export/csv")
-async def export_books_csv(request: Request, db: AsyncSession = Depends(get_db)):
-    user_ip = request.client.host
-    rate_limit(user_ip=user_ip)
-
-    result = await db.execute(select(Book).options(selectinload(Book.author)))
-    books = result.scalars().all()
-
-    output = StringIO()
-    writer = csv.DictWriter(output, fieldnames=["id", "title", "author", "genre", "published_year"])
-    writer.writeheader()
-
-    for book in books:
-        writer.writerow({
-            "id": book.id,
-            "title": book.title,
-            "author": book.author.name,
-            "genre": book.genre,
-            "published_year": book.published_year
-        })
-
-    output.seek(0)
-
-    return Response(content=output.getvalue(), media_type="text/csv",
-                    headers={"Content-Disposition": "attachment; filename=books.csv"})
+async def export_books_csv(
+        fetch_size: int = Query(EXPORT_FETCH_SIZE, ge=1, le=10000),
+        filter_params: BookFilterParams = Depends(),
+        validators: dict = Depends(export_not_modified),
+        db: AsyncSession = Depends(get_read_db),
+):
+    query = book_export_query(filter_params)
+
+    return StreamingResponse(iter_books_csv(db, query, fetch_size), media_type="text/csv",
+                             headers={"Content-Disposition": "attachment; filename=books.csv", **validators})
@@ -1,154 +1,124 @@
-import csv
+import asyncio
 import json
-from io import StringIO
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request
+from datetime import datetime, timezone
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from app.database import get_db
-from app.models import Author, Book
-from app.utils.rate_limit import rate_limit
+from starlette import status
+from app.crud.imports import BulkImporter
+from app.database import AsyncSessionLocal, get_db
+from app.schemas.imports import ImportJobSchema
+from app.utils.events import notify_change
+from app.utils.jobs import JobStore, get_job_store, import_workers
+from app.utils.uploads import iter_csv_batches, iter_json_batches, spool_upload
 
 router = APIRouter()
 
 
-@router.post("/csv/")
-async def import_books_and_authors_csv(request: Request, file: UploadFile = File(...),
-                                       db: AsyncSession = Depends(get_db)):
-    user_ip = request.client.host
-    rate_limit(user_ip=user_ip)
-    try:
-        contents = await file.read()
-        csv_file = StringIO(contents.decode("utf-8"))
-        reader = csv.DictReader(csv_file)
-
-        author_id_map = {}
-        imported_authors_count, imported_books_count, skipped_books_count = 0, 0, 0
-
-        async def get_or_create_author(author_name):
-            if author_name not in author_id_map:
-                existing_author = await db.execute(select(Author).filter(Author.name == author_name))
-                existing_author = existing_author.scalars().first()
-
-                if not existing_author:
-                    new_author = Author(name=author_name)
-                    db.add(new_author)
-                    await db.commit()
-                    await db.refresh(new_author)
-                    author_id_map[author_name] = new_author.id
-                    return new_author.id, True
-                else:
-                    author_id_map[author_name] = existing_author.id
-            return author_id_map[author_name], False
-
-        for row in reader:
-            _, created = await get_or_create_author(row["author_name"])
-            if created:
-                imported_authors_count += 1
-
-        csv_file.seek(0)
-        next(reader)
-
-        for row in reader:
-            author_id, _ = await get_or_create_author(row["author_name"])
-            existing_book = await db.execute(
-                select(Book).filter(
-                    Book.title == row["title"],
-                    Book.author_id == author_id,
-                )
-            )
-            if existing_book.scalars().first():
-                skipped_books_count += 1
-                continue
-
-            db.add(Book(
-                title=row["title"],
-                genre=row["genre"],
-                published_year=int(row["published_year"]),
-                author_id=author_id,
-            ))
-            imported_books_count += 1
+def import_summary(importer: BulkImporter):
+    if importer.imported_authors == 0 and importer.imported_books == 0:
+        return {"message": "No authors or books were imported."}
 
-        await db.commit()
+    return {
+        "message": "Import completed successfully.",
+        "imported_authors": importer.imported_authors,
+        "imported_books": importer.imported_books,
+        "skipped_books": importer.skipped_books,
+        "rows_per_second": importer.rows_per_second,
+    }
 
-        if imported_authors_count == 0 and imported_books_count == 0:
-            return {"message": "No authors or books were imported."}
 
-        return {
-            "message": "Import completed successfully.",
-            "imported_authors": imported_authors_count,
-            "imported_books": imported_books_count,
-            "skipped_books": skipped_books_count,
-        }
+def import_error_detail(exc: Exception) -> str:
+    if isinstance(exc, HTTPException):
+        return exc.detail
+    if isinstance(exc, json.JSONDecodeError):
+        return "Invalid JSON file."
+    return "Failed to process the file, check the format and try again."
 
+
+async def run_import_job(store: JobStore, job_id: str, file: UploadFile, parse_batches):
+    await store.update(job_id, status="running")
+    try:
+        async with AsyncSessionLocal() as db:
+            importer = BulkImporter(db, strict=False)
+            async for rows in parse_batches(file):
+                await importer.import_rows(rows)
+                await store.update(job_id, **importer.progress())
+            await db.commit()
+        notify_change("authors", "books")
+        await store.update(job_id, status="completed", finished_at=datetime.now(timezone.utc))
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to process the file, check the format and try again.")
+        await store.update(job_id, status="failed", error=import_error_detail(e),
+                           finished_at=datetime.now(timezone.utc))
+    finally:
+        await file.close()
 
 
-@router.post("/json/")
-async def import_books_and_authors_json(request: Request, file: UploadFile, db: AsyncSession = Depends(get_db)):
-    user_ip = request.client.host
-    rate_limit(user_ip=user_ip)
+async def enqueue_import(store: JobStore, kind: str, file: UploadFile, parse_batches):
+    upload = await spool_upload(file)
+    job = await store.create(kind=kind, filename=file.filename)
+
+    async def interrupted():
+        await upload.close()
+        await store.update(job["id"], status="failed", error="The import was interrupted by a server shutdown.",
+                           finished_at=datetime.now(timezone.utc))
+
     try:
-        contents = await file.read()
-        data = json.loads(contents)
-
-        if "authors" not in data or not isinstance(data["authors"], list):
-            raise HTTPException(status_code=400, detail="Invalid JSON format. 'authors' field is required.")
-
-        imported_authors_count, imported_books_count, skipped_books_count = 0, 0, 0
-
-        for author_data in data["authors"]:
-            author_name = author_data.get("name")
-            if not author_name:
-                continue
-
-            existing_author = await db.execute(select(Author).filter(Author.name == author_name))
-            existing_author = existing_author.scalars().first()
-
-            if not existing_author:
-                db_author = Author(name=author_name)
-                db.add(db_author)
-                await db.commit()
-                await db.refresh(db_author)
-                new_author_id = db_author.id
-                imported_authors_count += 1
-            else:
-                new_author_id = existing_author.id
-
-            for book_data in author_data.get("books", []):
-                title = book_data.get("title")
-                if not title:
-                    continue
-
-                existing_book = await db.execute(
-                    select(Book).filter(Book.title == title, Book.author_id == new_author_id)
-                )
-                if existing_book.scalars().first():
-                    skipped_books_count += 1
-                    continue
-
-                db_book = Book(
-                    title=title,
-                    genre=book_data.get("genre", ""),
-                    published_year=book_data.get("published_year", 0),
-                    author_id=new_author_id,
-                )
-                db.add(db_book)
-                imported_books_count += 1
+        import_workers.submit(run_import_job, store, job["id"], upload, parse_batches, on_cancel=interrupted)
+    except asyncio.QueueFull:
+        await upload.close()
+        await store.update(job["id"], status="failed", error="Import queue is full.",
+                           finished_at=datetime.now(timezone.utc))
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail="Too many imports in progress. Please try again later.")
+
+    return ImportJobSchema(**job)
+
+
+@router.post("/csv/")
+async def import_books_and_authors_csv(response: Response, file: UploadFile = File(...),
+                                       background: bool = False, db: AsyncSession = Depends(get_db),
+                                       store: JobStore = Depends(get_job_store)):
+    if background:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return await enqueue_import(store, "csv", file, iter_csv_batches)
 
+    try:
+        importer = BulkImporter(db)
+        async for rows in iter_csv_batches(file):
+            await importer.import_rows(rows)
         await db.commit()
+        notify_change("authors", "books")
+
+        return import_summary(importer)
+
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=import_error_detail(e))
 
-        if imported_authors_count == 0 and imported_books_count == 0:
-            return {"message": "No authors or books were imported."}
 
-        return {
-            "message": "Import completed successfully.",
-            "imported_authors": imported_authors_count,
-            "imported_books": imported_books_count,
-            "skipped_books": skipped_books_count,
-        }
+@router.post("/json/")
+async def import_books_and_authors_json(response: Response, file: UploadFile,
+                                        background: bool = False, db: AsyncSession = Depends(get_db),
+                                        store: JobStore = Depends(get_job_store)):
+    if background:
+        response.status_code = status.HTTP_202_ACCEPTED
+        return await enqueue_import(store, "json", file, iter_json_batches)
+
+    try:
+        importer = BulkImporter(db)
+        async for rows in iter_json_batches(file):
+            await importer.import_rows(rows)
+        await db.commit()
+        notify_change("authors", "books")
+
+        return import_summary(importer)
 
-    except json.JSONDecodeError:
-        raise HTTPException(status_code=400, detail="Invalid JSON file.")
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Failed to process the file, check the format and try again.")
+        raise HTTPException(status_code=400, detail=import_error_detail(e))
+
+
+@router.get("/jobs/{job_id}", response_model=ImportJobSchema)
+async def get_import_job(job_id: str, store: JobStore = Depends(get_job_store)):
+    job = await store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Import job with id: {job_id} not found")
+    return job
@@ -0,0 +1,25 @@
+from fastapi import APIRouter
+
+from app.crud.cache import book_list_cache, entity_cache
+from app.crud.recommend import recommendation_pools
+from app.database import pool_status, replica_router
+from app.utils.passwords import password_hasher
+from app.utils.rollups import rollups
+from app.utils.tokens import token_verifier
+
+
+router = APIRouter()
+
+
+@router.get("/")
+async def get_metrics_view():
+    return {
+        "db_pool": pool_status(),
+        "read_replicas": replica_router.stats(),
+        "entity_cache": entity_cache.stats(),
+        "book_list_cache": book_list_cache.stats(),
+        "recommendation_cache": recommendation_pools.stats(),
+        "password_hashing": password_hasher.stats(),
+        "token_cache": token_verifier.stats(),
+        "rollups": rollups.stats(),
+    }
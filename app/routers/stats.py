@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.crud.stats import get_author_counts, get_catalogue_stats, get_decade_counts, get_genre_counts
+from app.database import get_read_db
+from app.schemas.stats import AuthorCount, CatalogueStats, DecadeCount, GenreCount
+from app.utils.conditional import conditional_get
+
+router = APIRouter()
+stats_not_modified = conditional_get("books", "authors", cache_control=settings.CACHE_CONTROL_STATS)
+
+
+@router.get("/", response_model=CatalogueStats, dependencies=[Depends(stats_not_modified)])
+async def get_catalogue_stats_view(db: AsyncSession = Depends(get_read_db)):
+    return await get_catalogue_stats(db=db)
+
+
+@router.get("/genres", response_model=list[GenreCount], dependencies=[Depends(stats_not_modified)])
+async def get_genre_counts_view(db: AsyncSession = Depends(get_read_db)):
+    return await get_genre_counts(db=db)
+
+
+@router.get("/authors", response_model=list[AuthorCount], dependencies=[Depends(stats_not_modified)])
+async def get_author_counts_view(skip: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000),
+                                 db: AsyncSession = Depends(get_read_db)):
+    return await get_author_counts(db=db, skip=skip, limit=limit)
+
+
+@router.get("/decades", response_model=list[DecadeCount], dependencies=[Depends(stats_not_modified)])
+async def get_decade_counts_view(db: AsyncSession = Depends(get_read_db)):
+    return await get_decade_counts(db=db)
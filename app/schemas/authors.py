@@ -26,3 +26,8 @@ class AuthorSchema(AuthorBase):
 
     class Config:
         from_orm = True
+
+
+class AuthorPage(BaseModel):
+    items: list[AuthorSchema]
+    next_cursor: Optional[str] = None
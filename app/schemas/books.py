@@ -48,10 +48,33 @@ class BookUpdate(BookBase):
     author_id: Optional[int] = None
 
 
+class BookPatch(BookUpdate):
+    id: int
+
+
+class BookBulkDelete(BaseModel):
+    ids: list[int]
+
+
 class BookDeleteResponse(BaseModel):
     message: str
 
 
+class BookBulkResult(BaseModel):
+    index: int
+    status: str
+    id: Optional[int] = None
+    detail: Optional[str] = None
+
+
+class BookBulkResponse(BaseModel):
+    created: int = 0
+    updated: int = 0
+    deleted: int = 0
+    failed: int = 0
+    results: list[BookBulkResult]
+
+
 class BookSchema(BookBase):
     id: int
     author: AuthorSchema
@@ -60,6 +83,11 @@ class BookSchema(BookBase):
         from_orm = True
 
 
+class BookPage(BaseModel):
+    items: list[BookSchema]
+    next_cursor: Optional[str] = None
+
+
 class BookFilterParams(BaseModel):
     title: Optional[str] = None
     author_name: Optional[str] = None
@@ -0,0 +1,19 @@
+from datetime import datetime
+from pydantic import BaseModel
+from typing import Optional
+
+
+class ImportJobSchema(BaseModel):
+    id: str
+    kind: str
+    filename: Optional[str] = None
+    status: str
+    rows_processed: int = 0
+    rows_per_second: float = 0.0
+    imported_authors: int = 0
+    imported_books: int = 0
+    skipped_books: int = 0
+    failed_rows: int = 0
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
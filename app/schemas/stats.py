@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+
+
+class GenreCount(BaseModel):
+    genre: str
+    books: int
+
+
+class AuthorCount(BaseModel):
+    author_id: int
+    name: str
+    books: int
+
+
+class DecadeCount(BaseModel):
+    decade: int
+    books: int
+
+
+class CatalogueStats(BaseModel):
+    books: int
+    authors_with_books: int
+    genres: list[GenreCount]
+    decades: list[DecadeCount]
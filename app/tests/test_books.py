@@ -211,3 +211,47 @@ async def test_delete_book_route(test_db):
 
         delete_author_response = await client.delete(f"/api/authors/{author_id}")
         assert delete_author_response.status_code == 200, delete_author_response.text
+
+
+@pytest.mark.asyncio
+async def test_get_books_cursor_pagination_route(test_db):
+    async with AsyncClient(base_url=base_url) as client:
+        access_token = await login(client)
+        client.headers["Authorization"] = f"Bearer {access_token}"
+
+        author_response = await client.post("/api/authors/", json={"name": "Cursor Author"})
+        author_id = author_response.json()["id"]
+
+        book_ids = []
+        for title in ["Cursor Book A", "Cursor Book B", "Cursor Book C"]:
+            create_response = await client.post("/api/books/", json={
+                "title": title,
+                "genre": "Fiction",
+                "published_year": 2024,
+                "author_id": author_id
+            })
+            book_ids.append(create_response.json()["id"])
+
+        params = {"pagination": "cursor", "limit": 2, "title": "Cursor Book", "sort_by": "title"}
+        response = await client.get("/api/books/", params=params)
+        assert response.status_code == 200, response.text
+        first_page = response.json()
+        assert [book["title"] for book in first_page["items"]] == ["Cursor Book A", "Cursor Book B"]
+        assert first_page["next_cursor"]
+
+        response = await client.get("/api/books/", params={**params, "cursor": first_page["next_cursor"]})
+        assert response.status_code == 200, response.text
+        second_page = response.json()
+        assert [book["title"] for book in second_page["items"]] == ["Cursor Book C"]
+        assert second_page["next_cursor"] is None
+
+        for limit in (0, -1, 1001):
+            response = await client.get("/api/books/", params={**params, "limit": limit})
+            assert response.status_code == 422, response.text
+
+        for book_id in book_ids:
+            delete_response = await client.delete(f"/api/books/{book_id}")
+            assert delete_response.status_code == 200, delete_response.text
+
+        delete_author_response = await client.delete(f"/api/authors/{author_id}")
+        assert delete_author_response.status_code == 200, delete_author_response.text
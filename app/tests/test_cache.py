@@ -0,0 +1,104 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from app.crud.cache import MemoryCacheBackend, ReadThroughCache, ResultCache
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_evicts_by_tag_and_size():
+    backend = MemoryCacheBackend(max_entries=2)
+    await backend.set("author:1", {"name": "Orwell"}, ttl=60, tags=["author:1"])
+    await backend.set("book:1", {"title": "1984"}, ttl=60, tags=["author:1"])
+    await backend.invalidate_tag("author:1")
+    assert await backend.get("author:1") is None
+    assert await backend.get("book:1") is None
+
+    await backend.set("book:1", {"title": "1984"}, ttl=60)
+    await backend.set("book:2", {"title": "Animal Farm"}, ttl=60)
+    await backend.get("book:1")
+    await backend.set("book:3", {"title": "Homage to Catalonia"}, ttl=60)
+    assert await backend.get("book:2") is None
+    assert await backend.get("book:1") == {"title": "1984"}
+
+    await backend.set("book:4", {"title": "Burmese Days"}, ttl=0)
+    assert await backend.get("book:4") is None
+
+
+@pytest.mark.asyncio
+async def test_read_through_cache_coalesces_concurrent_misses():
+    cache = ReadThroughCache(MemoryCacheBackend(), ttl=60)
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"id": 1}
+
+    results = await asyncio.gather(*[cache.get_or_load("book:1", load) for _ in range(10)])
+    assert results == [{"id": 1}] * 10
+    assert calls == 1
+    assert await cache.get_or_load("book:1", load) == {"id": 1}
+    assert cache.stats() == {"hits": 1, "misses": 1, "coalesced": 9, "hit_ratio": 0.0909}
+
+    async def missing():
+        raise HTTPException(status_code=404, detail="Book with id: 2 not found")
+
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            await cache.get_or_load("book:2", missing)
+
+
+@pytest.mark.asyncio
+async def test_read_through_cache_skips_loads_overlapping_invalidation():
+    cache = ReadThroughCache(MemoryCacheBackend(), ttl=60)
+
+    async def load():
+        await cache.delete("book:1")
+        return {"title": "stale"}
+
+    assert await cache.get_or_load("book:1", load) == {"title": "stale"}
+    assert await cache.backend.get("book:1") is None
+
+
+@pytest.mark.asyncio
+async def test_read_through_cache_reloads_other_versions():
+    cache = ReadThroughCache(MemoryCacheBackend(), ttl=60)
+
+    async def load(title):
+        return {"title": title}
+
+    assert await cache.get_or_load("book:1", lambda: load("1984"), version='W/"books.1"') == {"title": "1984"}
+    assert await cache.get_or_load("book:1", lambda: load("other"), version='W/"books.1"') == {"title": "1984"}
+    assert await cache.get_or_load("book:1", lambda: load("other")) == {"title": "1984"}
+    # Written through another process: the version moved but this process wasn't told.
+    assert await cache.get_or_load("book:1", lambda: load("Animal Farm"), version='W/"books.2"') == {
+        "title": "Animal Farm"}
+    assert await cache.get_or_load("book:1", lambda: load("other"), version='W/"books.2"') == {
+        "title": "Animal Farm"}
+
+
+@pytest.mark.asyncio
+async def test_result_cache_is_bounded_by_bytes_and_generation():
+    cache = ResultCache(max_bytes=10, ttl=60)
+
+    async def body(content: bytes):
+        return content
+
+    assert await cache.get_or_load("a", lambda: body(b"12345")) == b"12345"
+    assert await cache.get_or_load("a", lambda: body(b"other")) == b"12345"
+    await cache.get_or_load("b", lambda: body(b"123456"))
+    assert list(cache.entries) == ["b"]
+    await cache.get_or_load("c", lambda: body(b"x" * 11))
+    assert cache.stats()["bytes"] == 6
+
+    cache.bump("books")
+    assert await cache.get_or_load("b", lambda: body(b"new")) == b"new"
+
+    async def bumped_while_loading():
+        cache.bump("books")
+        return b"stale"
+
+    await cache.get_or_load("d", bumped_while_loading)
+    assert "d" not in cache.entries
+    assert cache.stats()["evictions"] == 1
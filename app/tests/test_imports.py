@@ -0,0 +1,131 @@
+import asyncio
+import pytest
+from app.crud.imports import BulkImporter
+from app.utils.uploads import iter_csv_batches
+from app.utils.jobs import InMemoryJobStore, WorkerPool
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_updates_job_store():
+    store = InMemoryJobStore()
+    pool = WorkerPool(workers=2, queue_size=4)
+
+    async def fake_import(job_id: str, rows: int):
+        await store.update(job_id, status="running")
+        await store.update(job_id, status="completed", rows_processed=rows)
+
+    job = await store.create(kind="csv", filename="books.csv")
+    assert job["status"] == "queued"
+
+    pool.submit(fake_import, job["id"], 42)
+    await pool.queue.join()
+
+    data = await store.get(job["id"])
+    assert data["status"] == "completed"
+    assert data["rows_processed"] == 42
+    assert await store.get("missing") is None
+
+    await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_rejects_jobs_when_queue_is_full():
+    pool = WorkerPool(workers=1, queue_size=1)
+    release = asyncio.Event()
+
+    async def blocked():
+        await release.wait()
+
+    pool.submit(blocked)
+    await asyncio.sleep(0)
+    pool.submit(blocked)
+
+    with pytest.raises(asyncio.QueueFull):
+        pool.submit(blocked)
+
+    release.set()
+    await pool.queue.join()
+    await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_job_store_prunes_oldest_finished_jobs():
+    store = InMemoryJobStore(max_jobs=2)
+    first = await store.create(kind="csv")
+    await store.update(first["id"], status="completed", finished_at=first["created_at"])
+    second = await store.create(kind="json")
+    third = await store.create(kind="csv")
+
+    assert await store.get(first["id"]) is None
+    assert await store.get(second["id"]) is not None
+    assert await store.get(third["id"]) is not None
+
+
+def test_importer_rejects_rows_missing_required_columns():
+    importer = BulkImporter(db=None, strict=False)
+
+    assert importer._normalize({"author_name": "Orwell", "title": ""}) == ("Orwell", None)
+    assert importer._normalize({"author_name": "Orwell", "title": "1984", "genre": "Dystopian",
+                                "published_year": "1949"}) == (
+        "Orwell", {"title": "1984", "genre": "Dystopian", "published_year": 1949})
+    for row in (
+        {"author_name": " ", "title": "1984", "genre": "Dystopian", "published_year": "1949"},
+        {"author_name": "Orwell", "title": "1984", "genre": "", "published_year": "1949"},
+        {"author_name": "Orwell", "title": "1984", "genre": None, "published_year": "1949"},
+        {"author_name": "Orwell", "title": "1984", "genre": "Dystopian"},
+        {"author_name": "Orwell", "title": "1984", "genre": "Dystopian", "published_year": None},
+    ):
+        with pytest.raises(ValueError):
+            importer._normalize(row)
+
+
+class ChunkedUpload:
+    """Stands in for an UploadFile, returning at most ``size`` bytes per read."""
+
+    def __init__(self, data: bytes, size: int):
+        self.data = data
+        self.size = size
+
+    async def read(self, size: int = -1) -> bytes:
+        chunk, self.data = self.data[:self.size], self.data[self.size:]
+        return chunk
+
+
+@pytest.mark.asyncio
+async def test_csv_batches_follow_csv_quoting_across_chunks():
+    data = (
+        'author_name,title,genre,published_year\n'
+        'Prince,12" Single,Classic,1984\n'
+        'Orwell,"Essays,\nVolume ""One""",Satire,1946\r\n'
+        'Huxley,Island,Fiction,1962'
+    ).encode()
+
+    for size in (1, 7, len(data)):
+        rows = [row async for batch in iter_csv_batches(ChunkedUpload(data, size), batch_size=2) for row in batch]
+        assert [row["title"] for row in rows] == ['12" Single', 'Essays,\nVolume "One"', "Island"]
+        assert rows[1]["published_year"] == "1946" and rows[2]["published_year"] == "1962"
+
+
+@pytest.mark.asyncio
+async def test_worker_pool_stop_marks_interrupted_jobs():
+    store = InMemoryJobStore()
+    pool = WorkerPool(workers=1, queue_size=4)
+    started = asyncio.Event()
+
+    async def slow_import(job_id: str):
+        await store.update(job_id, status="running")
+        started.set()
+        await asyncio.Event().wait()
+
+    def interrupted(job_id: str):
+        return lambda: store.update(job_id, status="failed", error="interrupted")
+
+    running = await store.create(kind="csv")
+    queued = await store.create(kind="csv")
+    pool.submit(slow_import, running["id"], on_cancel=interrupted(running["id"]))
+    pool.submit(slow_import, queued["id"], on_cancel=interrupted(queued["id"]))
+    await started.wait()
+    await pool.stop()
+
+    assert (await store.get(running["id"]))["status"] == "failed"
+    assert (await store.get(queued["id"]))["status"] == "failed"
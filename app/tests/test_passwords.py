@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import time
+import pytest
+from passlib.context import CryptContext
+from app.utils.passwords import PasswordHasher
+
+
+def fast_hasher(**kwargs) -> PasswordHasher:
+    hasher = PasswordHasher(**kwargs)
+    hasher.context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+    return hasher
+
+
+@pytest.mark.asyncio
+async def test_hashing_runs_off_the_loop_within_the_concurrency_limit():
+    hasher = fast_hasher(max_concurrency=2)
+    hashed = await hasher.hash("secret")
+    lock = threading.Lock()
+    running, peak = 0, 0
+
+    def slow_verify(password, hashed_password):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return password == "secret"
+
+    hasher.context.verify = slow_verify
+    results = await asyncio.gather(*(hasher.verify("reader", "secret", hashed) for _ in range(6)))
+
+    assert results == [True] * 6
+    assert peak == 2
+    stats = hasher.stats()
+    assert stats["completed"] == 7 and stats["waiting"] == 0 and stats["running"] == 0
+    assert stats["max_wait_ms"] > 0
+    hasher.stop()
+
+
+@pytest.mark.asyncio
+async def test_verified_credentials_are_cached_until_the_hash_changes():
+    hasher = fast_hasher(max_concurrency=1, cache_ttl=60)
+    hashed = await hasher.hash("secret")
+
+    assert await hasher.verify("reader", "secret", hashed)
+    assert await hasher.verify("reader", "secret", hashed)
+    assert hasher.stats()["cache_hits"] == 1
+
+    assert not await hasher.verify("reader", "wrong", hashed)
+    assert not await hasher.verify("reader", "wrong", hashed)
+    assert hasher.stats()["cache_hits"] == 1
+
+    rehashed = await hasher.hash("secret")
+    assert await hasher.verify("reader", "secret", rehashed)
+    assert hasher.stats()["cache_hits"] == 1
+    assert hasher.stats()["cache_entries"] == 2
+    hasher.stop()
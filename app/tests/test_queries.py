@@ -0,0 +1,373 @@
+import itertools
+from datetime import datetime, timedelta, timezone
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import delete, event, update
+
+from app.core.config import settings
+from app.crud import bulk_books
+from app.crud.cache import book_list_cache
+from app.crud.recommend import recommendation_pools
+from app.database import AsyncSessionLocal, engine
+from app.main import app
+from app.models import Author, Book, TableVersion
+from app.routers.auth import create_access_token
+from app.utils.rollups import rollups
+
+base_url = "http://test/"
+client_addresses = itertools.count(1)
+
+
+def api_client(**kwargs) -> AsyncClient:
+    # A fresh client address per test, so rate limits don't carry over from earlier tests.
+    transport = ASGITransport(app=app, client=(f"10.0.0.{next(client_addresses)}", 123))
+    return AsyncClient(transport=transport, base_url=base_url, **kwargs)
+
+
+@pytest_asyncio.fixture
+async def statements():
+    async with AsyncSessionLocal() as session:
+        author = Author(name="Query Count Author")
+        session.add(author)
+        await session.flush()
+        session.add(Book(title="Query Count Book", genre="Fiction", published_year=2001, author_id=author.id))
+        await session.commit()
+
+    book_list_cache.bump()
+    recommendation_pools.clear()
+    issued = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        issued.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield issued
+    event.remove(engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(Book).where(Book.author_id == author.id))
+        await session.execute(delete(Author).where(Author.id == author.id))
+        await session.commit()
+    # Pooled connections belong to this test's event loop.
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_books_author_filter_is_single_query(statements):
+    async with api_client() as client:
+        response = await client.get("/api/books/", params={"author_name": "query count"})
+        # The catalogue version for the ETag, then the books.
+        assert len(statements) == 2
+        # Repeating the listing, in any letter case, is served from the result cache.
+        cached = await client.get("/api/books/", params={"author_name": "Query Count"})
+
+    assert response.status_code == 200
+    assert [book["title"] for book in response.json()] == ["Query Count Book"]
+    assert response.json()[0]["author"]["name"] == "Query Count Author"
+    assert cached.content == response.content
+    assert len(statements) == 3
+
+
+@pytest.mark.asyncio
+async def test_books_not_modified_skips_the_listing(statements):
+    async with api_client() as client:
+        response = await client.get("/api/books/", params={"title": "query count"})
+        statements.clear()
+        not_modified = await client.get("/api/books/", params={"title": "query count"},
+                                        headers={"If-None-Match": response.headers["ETag"]})
+
+    assert response.status_code == 200
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["ETag"] == response.headers["ETag"]
+    assert len(statements) == 1
+    assert "table_versions" in statements[0]
+
+
+@pytest.mark.asyncio
+async def test_catalogue_version_survives_rollups_and_tracks_writes(statements):
+    async with api_client() as client:
+        first = await client.get("/api/authors/")
+        await rollups.run_once()
+        rolled_up = await client.get("/api/authors/")
+
+        # Dated long ago, so the second of the last change is over.
+        async with AsyncSessionLocal() as session:
+            await session.execute(update(TableVersion).where(TableVersion.table_name == "authors")
+                                  .values(updated_at=datetime(2000, 1, 1, tzinfo=timezone.utc)))
+            await session.commit()
+        dated = await client.get("/api/authors/")
+        since = {"If-Modified-Since": dated.headers["Last-Modified"]}
+        unmodified = await client.get("/api/authors/", headers=since)
+        # If-None-Match takes precedence over the date.
+        mismatched = await client.get("/api/authors/", headers={**since, "If-None-Match": 'W/"other"'})
+
+        async with AsyncSessionLocal() as session:
+            session.add(Author(name="Query Count Version Author"))
+            await session.commit()
+        written = await client.get("/api/authors/", headers={"If-None-Match": first.headers["ETag"]})
+        written_since = await client.get("/api/authors/", headers=since)
+
+        async with AsyncSessionLocal() as session:
+            await session.execute(delete(Author).where(Author.name == "Query Count Version Author"))
+            await session.commit()
+
+    assert rolled_up.headers["ETag"] == first.headers["ETag"]
+    assert dated.headers["Last-Modified"] == "Sat, 01 Jan 2000 00:00:00 GMT"
+    assert unmodified.status_code == 304
+    assert mismatched.status_code == 200
+    assert written.status_code == 200
+    assert written.headers["ETag"] != first.headers["ETag"]
+    assert written_since.status_code == 200
+    # Not sent while writes may still land in the same second.
+    assert written_since.headers.get("Last-Modified") != dated.headers["Last-Modified"]
+
+
+@pytest.mark.asyncio
+async def test_cached_pages_follow_writes_from_other_processes(statements):
+    async with api_client() as client:
+        first = await client.get("/api/books/", params={"author_name": "query count"})
+
+        # Committed without notifying this process, as a write through another worker would be.
+        async with AsyncSessionLocal() as session:
+            author_id = first.json()[0]["author_id"]
+            session.add(Book(title="Query Count Sequel", genre="Fiction", published_year=2002, author_id=author_id))
+            await session.commit()
+        second = await client.get("/api/books/", params={"author_name": "query count"})
+
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert [book["title"] for book in second.json()] == ["Query Count Book", "Query Count Sequel"]
+
+
+@pytest.mark.asyncio
+async def test_recommend_author_filter_is_single_query(statements):
+    async with api_client() as client:
+        response = await client.get("/api/recommend/", params={"author_name": "query count"})
+        # The first request loads the id pool, later ones only fetch the picked row.
+        assert len(statements) == 2
+        statements.clear()
+        response = await client.get("/api/recommend/", params={"author_name": "Query Count"})
+
+    assert response.status_code == 200
+    assert response.json()["title"] == "Query Count Book"
+    assert len(statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_one_pool_checkout_per_request(statements):
+    checkouts = []
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checkouts.append(connection_record)
+
+    event.listen(engine.sync_engine, "checkout", on_checkout)
+    try:
+        async with api_client() as client:
+            assert (await client.get("/")).status_code == 200
+            assert len(checkouts) == 0
+
+            for url in ("/api/books/", "/api/authors/", "/api/exports/export/json"):
+                checkouts.clear()
+                response = await client.get(url, params={"title": "query count"})
+                assert response.status_code == 200
+                assert len(checkouts) == 1, url
+
+            checkouts.clear()
+            response = await client.post("/api/auth/token", data={"username": "nobody", "password": "secret"})
+            assert response.status_code == 401
+            assert len(checkouts) == 1
+
+            metrics = (await client.get("/api/metrics/")).json()["db_pool"]
+            assert metrics["checked_out"] == 0
+            assert metrics["checkouts"] >= 4
+    finally:
+        event.remove(engine.sync_engine, "checkout", on_checkout)
+
+
+@pytest.mark.asyncio
+async def test_bulk_book_writes_are_set_based(statements):
+    headers = {"Authorization": f"Bearer {create_access_token('test_user', 1, timedelta(minutes=5))}"}
+    async with api_client(headers=headers) as client:
+        author_id = (await client.get("/api/books/", params={"title": "query count"})).json()[0]["author_id"]
+        books = [{"title": f"Query Count Bulk {i}", "genre": "Fiction", "published_year": 2001, "author_id": author_id}
+                 for i in range(200)]
+        books += [
+            {"title": "Query Count Book", "genre": "Fiction", "published_year": 2001, "author_id": author_id},
+            {"title": "Query Count Orphan", "genre": "Fiction", "published_year": 2001, "author_id": -1},
+        ]
+
+        statements.clear()
+        created = (await client.post("/api/books/bulk", json=books)).json()
+        # Title lookup, author lookup and one multi-row INSERT, whatever the number of books.
+        assert len(statements) == 3
+        assert (created["created"], created["failed"]) == (200, 2)
+        assert [result["detail"] for result in created["results"][-2:]] == [
+            "Book with title 'Query Count Book' already exists.",
+            "Author with id: -1 does not exist.",
+        ]
+        ids = [result["id"] for result in created["results"][:200]]
+
+        patched = (await client.patch("/api/books/bulk", json=[
+            {"id": ids[0], "published_year": 1999},
+            {"id": ids[1], "title": "Query Count Bulk 2"},
+            {"id": -1, "genre": "Satire"},
+        ])).json()
+        assert [result["status"] for result in patched["results"]] == ["updated", "error", "error"]
+
+        other_id = (await client.post("/api/authors/", json={"name": "Query Count Bulk Other"})).json()["id"]
+        statements.clear()
+        upserted = (await client.put("/api/books/bulk", json=[
+            {"title": "Query Count Bulk 0", "genre": "Satire", "published_year": 2000, "author_id": author_id},
+            {"title": "Query Count Bulk New", "genre": "Satire", "published_year": 2000, "author_id": author_id},
+            {"title": "Query Count Bulk 1", "genre": "Satire", "published_year": 2000, "author_id": other_id},
+        ])).json()
+        # Title lookup, author lookup and one INSERT ... ON CONFLICT.
+        assert len(statements) == 3
+        assert [result["status"] for result in upserted["results"]] == ["updated", "created", "error"]
+        assert upserted["results"][0]["id"] == ids[0]
+        assert upserted["results"][2]["detail"] == "Book with title 'Query Count Bulk 1' already exists."
+        assert (await client.delete(f"/api/authors/{other_id}")).status_code == 200
+
+        book = (await client.get(f"/api/books/{ids[0]}")).json()
+        assert (book["genre"], book["published_year"]) == ("Satire", 2000)
+
+        deleted = (await client.post("/api/books/bulk/delete", json={"ids": [ids[0], ids[0], -1]})).json()
+        assert [result["status"] for result in deleted["results"]] == ["deleted", "error", "error"]
+        assert (await client.get(f"/api/books/{ids[0]}")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_bulk_upsert_leaves_titles_taken_after_the_lookup(statements, monkeypatch):
+    async def nobody_holds_them(db, titles, column=None):
+        # As if another request created the book between the lookup and the upsert.
+        return {}
+
+    monkeypatch.setattr(bulk_books, "find_books_by_title", nobody_holds_them)
+    headers = {"Authorization": f"Bearer {create_access_token('test_user', 1, timedelta(minutes=5))}"}
+    async with api_client(headers=headers) as client:
+        other_id = (await client.post("/api/authors/", json={"name": "Query Count Upsert Other"})).json()["id"]
+        upserted = (await client.put("/api/books/bulk", json=[
+            {"title": "Query Count Book", "genre": "Satire", "published_year": 1990, "author_id": other_id},
+            {"title": "Query Count Upsert New", "genre": "Satire", "published_year": 1990, "author_id": other_id},
+        ])).json()
+        book = (await client.get("/api/books/", params={"title": "query count book"})).json()[0]
+        await client.post("/api/books/bulk/delete", json={"ids": [upserted["results"][1]["id"]]})
+        assert (await client.delete(f"/api/authors/{other_id}")).status_code == 200
+
+    assert [result["status"] for result in upserted["results"]] == ["error", "created"]
+    assert upserted["results"][0]["detail"] == "Book with title 'Query Count Book' already exists."
+    assert (book["genre"], book["published_year"]) == ("Fiction", 2001)
+
+
+@pytest.mark.asyncio
+async def test_updates_are_single_statements(statements):
+    headers = {"Authorization": f"Bearer {create_access_token('test_user', 1, timedelta(minutes=5))}"}
+    async with api_client(headers=headers) as client:
+        book = (await client.get("/api/books/", params={"title": "query count"})).json()[0]
+
+        statements.clear()
+        response = await client.put(f"/api/books/{book['id']}", json={"published_year": 1999})
+        assert response.status_code == 200
+        assert response.json()["published_year"] == 1999
+        assert response.json()["author"]["name"] == "Query Count Author"
+        assert len(statements) == 1
+
+        statements.clear()
+        response = await client.put(f"/api/authors/{book['author_id']}", json={"name": "Query Count Renamed"})
+        assert response.status_code == 200
+        assert response.json() == {"id": book["author_id"], "name": "Query Count Renamed"}
+        assert len(statements) == 1
+
+        # Constraint violations keep their existing responses.
+        response = await client.put(f"/api/books/{book['id']}", json={"author_id": -1})
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Author with id: -1 does not exist."
+
+        other = await client.post("/api/authors/", json={"name": "Query Count Other"})
+        assert other.status_code == 200, other.text
+        other = other.json()
+        response = await client.put(f"/api/authors/{other['id']}", json={"name": "Query Count Renamed"})
+        await client.delete(f"/api/authors/{other['id']}")
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Author with name 'Query Count Renamed' already exists."
+
+        assert (await client.put("/api/books/-1", json={"published_year": 1999})).status_code == 404
+        assert (await client.put("/api/authors/-1", json={"name": "Query Count Missing"})).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_creates_are_single_statements(statements):
+    headers = {"Authorization": f"Bearer {create_access_token('test_user', 1, timedelta(minutes=5))}"}
+    async with api_client(headers=headers) as client:
+        author_id = (await client.get("/api/books/", params={"title": "query count"})).json()[0]["author_id"]
+        book = {"title": "Query Count Sequel", "genre": "Fiction", "published_year": 2002, "author_id": author_id}
+
+        statements.clear()
+        response = await client.post("/api/books/", json=book)
+        assert response.status_code == 200
+        assert response.json()["author"]["name"] == "Query Count Author"
+        assert len(statements) == 1
+        sequel_id = response.json()["id"]
+
+        statements.clear()
+        response = await client.post("/api/authors/", json={"name": "Query Count Second"})
+        assert response.status_code == 200
+        assert len(statements) == 1
+        second_id = response.json()["id"]
+
+        # A title is refused if any author's book has it, on create and on update alike.
+        response = await client.post("/api/books/", json={**book, "author_id": second_id})
+        await client.delete(f"/api/authors/{second_id}")
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Book with title 'Query Count Sequel' already exists."
+        response = await client.put(f"/api/books/{sequel_id}", json={"title": "Query Count Book"})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Book with title 'Query Count Book' already exists."
+
+        # Duplicates are detected by the unique constraints, with the existing messages.
+        response = await client.post("/api/books/", json=book)
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Book with title 'Query Count Sequel' already exists."
+        response = await client.post("/api/books/", json={**book, "title": "Query Count Orphan", "author_id": -1})
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Author with id: -1 does not exist."
+        response = await client.post("/api/authors/", json={"name": "Query Count Author"})
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Author with name 'Query Count Author' already exists."
+
+
+@pytest.mark.asyncio
+async def test_total_counts_avoid_scanning_unfiltered_listings(statements, monkeypatch):
+    async with api_client() as client:
+        statements.clear()
+        response = await client.get("/api/books/", params={"total": "exact", "limit": 1})
+        # Catalogue version, the page, then the trigger-kept counter.
+        assert len(statements) == 3
+        assert "table_versions" in statements[-1] and "count(" not in statements[-1]
+        assert response.headers["X-Total-Count-Type"] == "exact"
+        assert int(response.headers["X-Total-Count"]) >= 1
+
+        statements.clear()
+        cached = await client.get("/api/books/", params={"total": "exact", "limit": 1})
+        assert len(statements) == 1
+        assert cached.headers["X-Total-Count"] == response.headers["X-Total-Count"]
+
+        # Small filtered sets get an exact count even when an estimate is asked for.
+        statements.clear()
+        response = await client.get("/api/books/", params={"total": "estimated", "author_name": "query count"})
+        assert response.headers["X-Total-Count"] == "1"
+        assert response.headers["X-Total-Count-Type"] == "exact"
+        explain = next(statement for statement in statements if statement.startswith("EXPLAIN"))
+        assert "query count" not in explain
+
+        monkeypatch.setattr(settings, "TOTAL_COUNT_ESTIMATE_THRESHOLD", 0)
+        book_list_cache.bump()
+        response = await client.get("/api/books/", params={"total": "estimated", "author_name": "query count"})
+        assert response.headers["X-Total-Count-Type"] == "estimated"
+        assert int(response.headers["X-Total-Count"]) >= 1
+
+        response = await client.get("/api/authors/", params={"total": "exact", "limit": 1})
+        assert response.headers["X-Total-Count-Type"] == "exact"
+        assert int(response.headers["X-Total-Count"]) >= 1
+        assert "X-Total-Count" not in (await client.get("/api/authors/")).headers
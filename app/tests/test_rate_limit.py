@@ -0,0 +1,61 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from fastapi import FastAPI
+from app.utils.rate_limit import MemoryRateLimitBackend, RateLimit, RateLimitMiddleware
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_slides_and_sweeps():
+    clock = FakeClock()
+    backend = MemoryRateLimitBackend(sweep_interval=30, clock=clock)
+    limit = RateLimit("api", requests=4, window=10)
+
+    assert [(await backend.hit("api:1.2.3.4", limit))[0] for _ in range(5)] == [True] * 4 + [False]
+
+    # 2s into the next window, 80% of the previous window still counts.
+    clock.now += 12
+    assert (await backend.hit("api:1.2.3.4", limit)) == (True, 0.0)
+    assert (await backend.hit("api:1.2.3.4", limit)) == (False, 0.5)
+    clock.now += 0.6
+    assert (await backend.hit("api:1.2.3.4", limit))[0]
+
+    await backend.hit("api:5.6.7.8", limit)
+    clock.now += 35
+    await backend.hit("api:5.6.7.8", limit)
+    assert list(backend.counters) == ["api:5.6.7.8"]
+
+
+@pytest.mark.asyncio
+async def test_middleware_applies_first_matching_rule():
+    app = FastAPI()
+
+    @app.get("/api/books/")
+    async def books():
+        return []
+
+    @app.post("/api/imports/csv/")
+    async def imports():
+        return {}
+
+    app.add_middleware(RateLimitMiddleware, backend=MemoryRateLimitBackend(), rules=[
+        ("POST", "/api/imports", RateLimit("imports", 1, 60)),
+        (None, "/api/", RateLimit("api", 2, 60)),
+    ])
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.post("/api/imports/csv/")).status_code == 200
+        limited = await client.post("/api/imports/csv/")
+        assert [(await client.get("/api/books/")).status_code for _ in range(3)] == [200, 200, 429]
+        assert (await client.get("/docs")).status_code == 200
+
+    assert limited.status_code == 429
+    assert limited.json() == {"detail": "Too many requests. Please try again later."}
+    assert 1 <= int(limited.headers["Retry-After"]) <= 60
@@ -0,0 +1,66 @@
+from array import array
+import pytest
+from app.crud.recommend import MISSING, RecommendationPools
+from app.utils.events import notify_change, on_change, remove_listener
+
+
+@pytest.fixture
+def listen():
+    registered = []
+
+    def register(listener, *tables):
+        on_change(*tables)(listener)
+        registered.append((listener, tables))
+
+    yield register
+    for listener, tables in registered:
+        remove_listener(listener, *tables)
+
+
+def test_recommendation_pools_hits_and_eviction():
+    pools = RecommendationPools(ttl=60, max_pools=2, max_pool_size=10)
+
+    assert pools.get(pools.key(genre="Fiction")) is MISSING
+    pools.put(pools.key(genre="Fiction"), array("q", [1, 2]))
+    pools.put(pools.key(author_name="Orwell"), None)
+    assert pools.get(pools.key(author_name="orwell")) is None
+    assert list(pools.get(pools.key(genre="fiction"))) == [1, 2]
+
+    pools.put(pools.key(genre="Satire"), array("q"))
+    assert pools.get(pools.key(genre="Fiction")) is not MISSING
+    assert pools.get(pools.key(author_name="Orwell")) is MISSING
+
+    stats = pools.stats()
+    assert stats["hits"] == 3
+    assert stats["misses"] == 2
+    assert stats["pools"] == 2
+    assert stats["pooled_ids"] == 2
+
+
+def test_recommendation_pools_expire_and_invalidate(listen):
+    pools = RecommendationPools(ttl=0, max_pools=8, max_pool_size=10)
+    pools.put(pools.key(), array("q", [1]))
+    assert pools.get(pools.key()) is MISSING
+
+    pools.ttl = 60
+    pools.put(pools.key(), array("q", [1]))
+    pools.put_genres(["Fiction"])
+    listen(pools.clear, "recommend-test", "recommend-test-authors")
+    notify_change("recommend-test", "recommend-test-authors")
+
+    assert pools.get(pools.key()) is MISSING
+    assert pools.get_genres() is MISSING
+    assert pools.stats()["invalidations"] == 1
+
+
+def test_recommendation_pools_remember_oversized_filters():
+    pools = RecommendationPools(ttl=60, max_pools=8, max_pool_size=10)
+    pools.put(pools.key(genre="Fiction"), None)
+    pools.clear()
+
+    assert pools.get(pools.key(genre="Fiction")) is MISSING
+    assert pools.was_oversized(pools.key(genre="fiction"))
+    assert pools.stats()["oversized"] == 1
+
+    pools.put(pools.key(genre="Fiction"), array("q", [1]))
+    assert not pools.was_oversized(pools.key(genre="Fiction"))
@@ -0,0 +1,97 @@
+import time
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.requests import Request
+from app.crud.cache import MemoryCacheBackend, ReadThroughCache
+from app.database import (READ_PRIMARY_COOKIE, InstrumentedQueuePool, ReplicaRouter, get_read_db, is_replica_session,
+                          pool_status)
+
+
+async def stand_in(path, name: str):
+    # A queue pool like the real replicas get, so least_load has checkouts to compare.
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=InstrumentedQueuePool)
+    async with engine.begin() as conn:
+        await conn.execute(text("CREATE TABLE IF NOT EXISTS stand_in (name TEXT)"))
+        await conn.execute(text("INSERT INTO stand_in (name) VALUES (:name)"), {"name": name})
+    return engine
+
+
+async def read_name(router: ReplicaRouter) -> str:
+    async with router.session() as session:
+        return (await session.execute(text("SELECT name FROM stand_in"))).scalar()
+
+
+@pytest.mark.asyncio
+async def test_replica_router_strategies_and_failover(tmp_path):
+    primary = await stand_in(tmp_path / "primary.db", "primary")
+    first = await stand_in(tmp_path / "first.db", "first")
+    second = await stand_in(tmp_path / "second.db", "second")
+    router = ReplicaRouter(primary, [first, second])
+
+    assert [await read_name(router) for _ in range(4)] == ["first", "second", "first", "second"]
+    # Each engine reports its own pool.
+    assert [pool["checkouts"] for pool in router.stats()["pools"]] == [3, 3]
+    assert pool_status(primary)["checkouts"] == 1
+
+    router.strategy = "least_load"
+    async with first.connect() as busy:
+        await busy.execute(text("SELECT 1"))
+        assert await read_name(router) == "second"
+
+    broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/replica.db", poolclass=InstrumentedQueuePool)
+    router.replicas = [first, broken]
+    await router.check_health()
+    assert router.healthy == [first]
+
+    router.replicas = [broken]
+    await router.check_health()
+    assert await read_name(router) == "primary"
+    assert router.stats()["primary_fallbacks"] == 1
+
+    for engine in (primary, first, second, broken):
+        await engine.dispose()
+
+
+def make_request(cookie: str = "") -> Request:
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "state": {}})
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes_cookie_keeps_reads_on_primary():
+    request = make_request()
+    await get_read_db(request)
+    assert "read_db" in request.scope["state"] and "db" not in request.scope["state"]
+
+    request = make_request(f"{READ_PRIMARY_COOKIE}={time.time() + 10:.0f}")
+    await get_read_db(request)
+    assert "db" in request.scope["state"] and "read_db" not in request.scope["state"]
+
+    request = make_request(f"{READ_PRIMARY_COOKIE}={time.time() - 10:.0f}")
+    await get_read_db(request)
+    assert "read_db" in request.scope["state"]
+
+
+@pytest.mark.asyncio
+async def test_replica_reads_do_not_fill_shared_caches(tmp_path):
+    primary = await stand_in(tmp_path / "primary.db", "primary")
+    replica = await stand_in(tmp_path / "replica.db", "replica")
+    cache = ReadThroughCache(MemoryCacheBackend(), ttl=60)
+    router = ReplicaRouter(primary, [replica])
+
+    async with router.session() as session:
+        assert is_replica_session(session)
+        value = await cache.get_or_load("name", lambda: read_name(router), store=not is_replica_session(session))
+    assert value == "replica"
+    assert await cache.backend.get("name") is None
+
+    router.replicas = router.healthy = []
+    async with router.session() as session:
+        assert not is_replica_session(session)
+        value = await cache.get_or_load("name", lambda: read_name(router), store=not is_replica_session(session))
+    assert value == "primary"
+    assert await cache.backend.get("name") == [None, "primary"]
+
+    for engine in (primary, replica):
+        await engine.dispose()
@@ -0,0 +1,62 @@
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+from pydantic import TypeAdapter
+from sqlalchemy import delete
+
+from app.crud.cache import book_list_cache
+from app.database import AsyncSessionLocal, engine
+from app.main import app
+from app.models import Author, Book
+from app.schemas.books import BookPage, BookSchema
+from app.utils.serialization import dumps
+
+book_list_adapter = TypeAdapter(list[BookSchema])
+
+
+@pytest_asyncio.fixture
+async def catalogue():
+    async with AsyncSessionLocal() as session:
+        authors = [Author(name="Serialization Émile Zola"), Author(name='Serialization "Quoted" 作者')]
+        session.add_all(authors)
+        await session.flush()
+        session.add_all([
+            Book(title=f"Serialization Tale {i} — ñ", genre=genre, published_year=1800 + i, author_id=author.id)
+            for i, (genre, author) in enumerate([("Fiction", authors[0]), ("Political Satire", authors[1]),
+                                                 ("Non-Fiction", authors[0])])
+        ])
+        await session.commit()
+    book_list_cache.bump()
+
+    transport = ASGITransport(app=app, client=("10.1.0.1", 123))
+    async with AsyncClient(transport=transport, base_url="http://test/") as client:
+        yield client
+
+    async with AsyncSessionLocal() as session:
+        await session.execute(delete(Book).where(Book.title.like("Serialization Tale %")))
+        await session.execute(delete(Author).where(Author.name.like("Serialization %")))
+        await session.commit()
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_fast_serialization_matches_validated_output(catalogue):
+    response = await catalogue.get("/api/books/", params={"title": "serialization tale", "sort_by": "published_year"})
+    assert response.status_code == 200
+    # Byte for byte what validating through BookSchema and FastAPI's encoder would produce.
+    validated = book_list_adapter.validate_json(response.content)
+    assert response.content == book_list_adapter.dump_json(validated)
+    assert [book.genre.value for book in validated] == ["Fiction", "Political Satire", "Non-Fiction"]
+
+    page = await catalogue.get("/api/books/", params={"title": "serialization tale", "pagination": "cursor", "limit": 2})
+    assert page.content == BookPage.model_validate_json(page.content).model_dump_json().encode()
+    assert page.json()["next_cursor"] is not None
+
+    detail = await catalogue.get(f"/api/books/{validated[1].id}")
+    assert detail.content == BookSchema.model_validate_json(detail.content).model_dump_json().encode()
+    assert detail.json()["author"]["name"] == 'Serialization "Quoted" 作者'
+    assert "ETag" in detail.headers
+
+
+def test_dumps_is_compact_utf8():
+    assert dumps({"title": "Ñ \"q\"", "items": [1, None]}) == '{"title":"Ñ \\"q\\"","items":[1,null]}'.encode()
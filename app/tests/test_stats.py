@@ -0,0 +1,67 @@
+from datetime import timedelta
+import pytest
+from httpx import ASGITransport, AsyncClient
+from app.database import engine
+from app.main import app
+from app.routers.auth import create_access_token
+from app.utils.rollups import rollups
+
+
+def counts(rows: list[dict], key: str) -> dict:
+    return {row[key]: row["books"] for row in rows}
+
+
+@pytest.mark.asyncio
+async def test_stats_follow_every_write_path():
+    headers = {"Authorization": f"Bearer {create_access_token('test_user', 1, timedelta(minutes=5))}"}
+    transport = ASGITransport(app=app, client=("10.2.0.1", 123))
+    async with AsyncClient(transport=transport, base_url="http://test/", headers=headers) as client:
+        genres_before = counts((await client.get("/api/stats/genres")).json(), "genre")
+        author_id = (await client.post("/api/authors/", json={"name": "Stats Author"})).json()["id"]
+
+        single = (await client.post("/api/books/", json={
+            "title": "Stats Single", "genre": "Mystery", "published_year": 1923, "author_id": author_id,
+        })).json()
+        await client.post("/api/books/bulk", json=[
+            {"title": f"Stats Bulk {i}", "genre": "Satire", "published_year": 1930 + i, "author_id": author_id}
+            for i in range(3)
+        ])
+        await client.put(f"/api/books/{single['id']}", json={"genre": "Satire"})
+
+        stats = (await client.get("/api/stats/")).json()
+        authors = counts((await client.get("/api/stats/authors", params={"limit": 1000})).json(), "author_id")
+        genres = counts((await client.get("/api/stats/genres")).json(), "genre")
+        decades = counts((await client.get("/api/stats/decades")).json(), "decade")
+
+        assert authors[author_id] == 4
+        assert genres["Satire"] == genres_before.get("Satire", 0) + 4
+        assert genres.get("Mystery", 0) == genres_before.get("Mystery", 0)
+        assert decades[1920] >= 1 and decades[1930] >= 3
+        assert stats["books"] == sum(genres.values())
+
+        # Rolling the deltas up leaves the counts exactly as they were.
+        await rollups.run_once()
+        assert counts((await client.get("/api/stats/genres")).json(), "genre") == genres
+        assert (await client.get("/api/stats/")).json() == stats
+
+        books = (await client.get("/api/books/", params={"author_name": "Stats Author", "limit": 10})).json()
+        await client.post("/api/books/bulk/delete", json={"ids": [book["id"] for book in books]})
+        await client.delete(f"/api/authors/{author_id}")
+
+        authors = counts((await client.get("/api/stats/authors", params={"limit": 1000})).json(), "author_id")
+        genres = counts((await client.get("/api/stats/genres")).json(), "genre")
+        assert author_id not in authors
+        assert genres.get("Satire", 0) == genres_before.get("Satire", 0)
+
+        await rollups.run_once()
+        assert author_id not in counts((await client.get("/api/stats/authors", params={"limit": 1000})).json(), "author_id")
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_author_counts_reject_out_of_range_pages():
+    transport = ASGITransport(app=app, client=("10.2.0.2", 123))
+    async with AsyncClient(transport=transport, base_url="http://test/") as client:
+        for params in ({"skip": -1}, {"limit": 0}, {"limit": -1}, {"limit": 1001}):
+            assert (await client.get("/api/stats/authors", params=params)).status_code == 422, params
+    await engine.dispose()
@@ -0,0 +1,59 @@
+import time
+import pytest
+from app.utils.tokens import JoseBackend, PyJWTBackend, TokenError, TokenVerifier
+
+
+def make_verifier(backend=JoseBackend, **kwargs) -> TokenVerifier:
+    options = {"cache_ttl": 300, "max_entries": 2, **kwargs}
+    return TokenVerifier(backend("testsecret", "HS256"), **options)
+
+
+@pytest.mark.parametrize("signer, reader", [(JoseBackend, PyJWTBackend), (PyJWTBackend, JoseBackend)])
+def test_backends_read_each_others_tokens(signer, reader):
+    token = signer("testsecret", "HS256").encode({"sub": "reader", "id": 1, "exp": int(time.time()) + 60})
+    assert reader("testsecret", "HS256").decode(token)["sub"] == "reader"
+    with pytest.raises(TokenError):
+        reader("othersecret", "HS256").decode(token)
+
+
+def test_verified_tokens_are_cached_until_they_expire():
+    verifier = make_verifier()
+    token = verifier.encode({"sub": "reader", "id": 1, "exp": int(time.time()) + 60})
+
+    assert verifier.verify(token)["id"] == 1
+    assert verifier.verify(token)["id"] == 1
+    assert (verifier.hits, verifier.misses) == (1, 1)
+
+    # An entry past its exp is verified again, and the backend rejects it.
+    verifier.entries[verifier.digest(token)] = (time.time() - 1, {"sub": "reader", "id": 1})
+
+    def expired(token):
+        raise TokenError("Signature has expired")
+
+    verifier.backend.decode = expired
+    with pytest.raises(TokenError):
+        verifier.verify(token)
+
+
+def test_cache_keeps_only_the_most_recent_tokens():
+    verifier = make_verifier()
+    tokens = [verifier.encode({"sub": "reader", "id": i, "exp": int(time.time()) + 60}) for i in range(3)]
+    for token in tokens:
+        verifier.verify(token)
+    assert list(verifier.entries) == [verifier.digest(token) for token in tokens[1:]]
+
+
+def test_revoked_tokens_are_rejected_even_when_cached():
+    verifier = make_verifier()
+    token = verifier.encode({"sub": "reader", "id": 1, "exp": int(time.time()) + 60})
+    other = verifier.encode({"sub": "writer", "id": 2, "exp": int(time.time()) + 60})
+    verifier.verify(token)
+    verifier.verify(other)
+
+    verifier.revoke(token)
+    with pytest.raises(TokenError):
+        verifier.verify(token)
+
+    verifier.add_revocation_check(lambda claims: claims["id"] == 2)
+    with pytest.raises(TokenError):
+        verifier.verify(other)
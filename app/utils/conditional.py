@@ -0,0 +1,77 @@
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from app.database import get_read_db, is_replica_session
+from app.models import TableChange, TableVersion
+
+
+def select_table_versions(tables: tuple[str, ...]):
+    """``(table_name, version, updated_at)`` rows: the folded version and change time combined
+    with the changes still pending."""
+    pending = select(func.count()).where(TableChange.table_name == TableVersion.table_name).scalar_subquery()
+    last_pending = (
+        select(func.max(TableChange.changed_at)).where(TableChange.table_name == TableVersion.table_name)
+        .scalar_subquery()
+    )
+    return (
+        # greatest() ignores the NULL when nothing is pending.
+        select(TableVersion.table_name, TableVersion.version + pending,
+               func.greatest(TableVersion.updated_at, last_pending))
+        .where(TableVersion.table_name.in_(tables))
+        .order_by(TableVersion.table_name)
+    )
+
+
+async def catalogue_validators(db: AsyncSession, tables: tuple[str, ...], cache_control: str) -> dict:
+    result = await db.execute(select_table_versions(tables).add_columns(func.clock_timestamp()))
+    versions = result.all()
+
+    headers = {"Cache-Control": cache_control}
+    if versions:
+        headers["ETag"] = 'W/"' + "-".join(f"{name}.{version}" for name, version, _, _ in versions) + '"'
+        last_modified = max(updated_at for _, _, updated_at, _ in versions).replace(microsecond=0)
+        now = versions[0][3].replace(microsecond=0)
+        # Dates have one-second resolution, so a date is only sent once its second is over:
+        # a later write then always falls in a later second. Replicas may not have applied
+        # writes the primary already made within that second, so they send none.
+        if last_modified < now and not is_replica_session(db):
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, headers: dict) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        etag = headers.get("ETag")
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        # Weak comparison, as RFC 9110 requires for If-None-Match.
+        return etag is not None and ("*" in tags or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in tags])
+
+    # Only used without If-None-Match, and only when this response would send a Last-Modified.
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None and "Last-Modified" in headers:
+        try:
+            return parsedate_to_datetime(headers["Last-Modified"]) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def conditional_get(*tables: str, cache_control: str):
+    """Dependency answering ``304`` from the catalogue version before the route does any work.
+
+    The ETag and Last-Modified come from ``table_versions`` and ``table_changes``, so they
+    change with any committed write to ``tables``. The validator headers are returned for
+    routes that build their own Response.
+    """
+
+    async def check(request: Request, response: Response, db: AsyncSession = Depends(get_read_db)) -> dict:
+        headers = await catalogue_validators(db, tables, cache_control)
+        if is_not_modified(request, headers):
+            raise HTTPException(status_code=304, headers=headers)
+        response.headers.update(headers)
+        return headers
+
+    return check
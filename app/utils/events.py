@@ -0,0 +1,35 @@
+import logging
+from collections import defaultdict
+
+logger = logging.getLogger(__name__)
+
+_listeners = defaultdict(list)
+
+
+def on_change(*tables: str):
+    """Register ``listener(table)`` to run after a committed write to any of ``tables``."""
+    def register(listener):
+        for table in tables:
+            _listeners[table].append(listener)
+        return listener
+    return register
+
+
+def remove_listener(listener, *tables: str):
+    for table in tables:
+        if listener in _listeners[table]:
+            _listeners[table].remove(listener)
+
+
+def notify_change(*tables: str):
+    # A listener registered for several of ``tables`` runs once, for the first of them.
+    called = []
+    for table in tables:
+        for listener in _listeners[table]:
+            if listener in called:
+                continue
+            called.append(listener)
+            try:
+                listener(table)
+            except Exception:
+                logger.exception("Change listener %s failed for %s", getattr(listener, "__name__", listener), table)
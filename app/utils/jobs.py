@@ -0,0 +1,123 @@
+import asyncio
+import logging
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class JobStore(ABC):
+    """Storage interface for background job state."""
+
+    @abstractmethod
+    async def create(self, **fields) -> dict:
+        ...
+
+    @abstractmethod
+    async def update(self, job_id: str, **fields) -> None:
+        ...
+
+    @abstractmethod
+    async def get(self, job_id: str) -> Optional[dict]:
+        ...
+
+
+class InMemoryJobStore(JobStore):
+    def __init__(self, max_jobs: int = 1000):
+        self.max_jobs = max_jobs
+        self.jobs = {}
+
+    async def create(self, **fields) -> dict:
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "created_at": datetime.now(timezone.utc),
+            "finished_at": None,
+            "error": None,
+            **fields,
+        }
+        self.jobs[job["id"]] = job
+        self._prune()
+        return dict(job)
+
+    async def update(self, job_id: str, **fields) -> None:
+        if job_id in self.jobs:
+            self.jobs[job_id].update(fields)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        job = self.jobs.get(job_id)
+        return dict(job) if job else None
+
+    def _prune(self):
+        # Drop the oldest finished jobs first; dicts keep insertion order.
+        excess = len(self.jobs) - self.max_jobs
+        for job_id in [job_id for job_id, job in self.jobs.items() if job["finished_at"]][:max(excess, 0)]:
+            del self.jobs[job_id]
+
+
+class WorkerPool:
+    """Fixed number of asyncio workers draining a bounded queue.
+
+    A job's ``on_cancel`` coroutine function, if given, is awaited when ``stop`` cancels the job
+    while it runs or before it started, so its state can be recorded as interrupted.
+    """
+
+    def __init__(self, workers: int, queue_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.queue = None
+        self.tasks = []
+
+    def _start(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def _work(self):
+        while True:
+            func, args, on_cancel = await self.queue.get()
+            try:
+                await func(*args)
+            except asyncio.CancelledError:
+                await self._cancelled(func, on_cancel)
+                raise
+            except Exception:
+                logger.exception("Background job %s failed", getattr(func, "__name__", func))
+            finally:
+                self.queue.task_done()
+
+    @staticmethod
+    async def _cancelled(func, on_cancel):
+        if on_cancel is None:
+            return
+        try:
+            await on_cancel()
+        except Exception:
+            logger.exception("Cancelling background job %s failed", getattr(func, "__name__", func))
+
+    def submit(self, func, *args, on_cancel=None):
+        """Queue ``func(*args)``; raises ``asyncio.QueueFull`` when the queue is at capacity."""
+        if not self.tasks:
+            self._start()
+        self.queue.put_nowait((func, args, on_cancel))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        # Jobs still waiting in the queue will never run.
+        while self.queue is not None and not self.queue.empty():
+            func, _, on_cancel = self.queue.get_nowait()
+            await self._cancelled(func, on_cancel)
+
+
+job_store = InMemoryJobStore()
+import_workers = WorkerPool(workers=settings.IMPORT_WORKERS, queue_size=settings.IMPORT_QUEUE_SIZE)
+
+
+def get_job_store() -> JobStore:
+    return job_store
@@ -0,0 +1,22 @@
+import base64
+import binascii
+import json
+from fastapi import HTTPException
+
+
+def encode_cursor(*values) -> str:
+    data = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> list:
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(data)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+
+    if not isinstance(values, list) or len(values) != len(types) or \
+            not all(isinstance(value, value_type) for value, value_type in zip(values, types)):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return values
@@ -0,0 +1,110 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from passlib.context import CryptContext
+from app.core.config import settings
+
+
+class PasswordHasher:
+    """Run bcrypt off the event loop, at most ``max_concurrency`` hashes at a time.
+
+    bcrypt releases the GIL, so a thread pool gives real parallelism without the pickling
+    cost of a process pool. Callers beyond the limit wait on a semaphore rather than piling
+    up in the executor, which is what ``stats()`` reports as queueing.
+
+    With ``cache_ttl`` above zero, successful verifications are remembered for that many
+    seconds so repeated logins with the same credentials skip bcrypt. Entries are keyed by
+    an HMAC under a per-process random key, never the password itself, and include the
+    stored hash so a password change invalidates them.
+    """
+
+    def __init__(self, max_concurrency: int, cache_ttl: int = 0, cache_max_entries: int = 10000):
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+        self.max_concurrency = max_concurrency
+        self.cache_ttl = cache_ttl
+        self.cache_max_entries = cache_max_entries
+        self.executor = None
+        self.slots = asyncio.Semaphore(max_concurrency)
+        self.cache_key = os.urandom(32)
+        self.verified = OrderedDict()
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.cache_hits = 0
+
+    async def _run(self, func, *args):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="bcrypt")
+
+        queued_at = time.monotonic()
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        waited = time.monotonic() - queued_at
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+
+        self.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self.slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, username: str, password: str, hashed_password: str) -> bool:
+        if self.cache_ttl <= 0:
+            return await self._run(self.context.verify, password, hashed_password)
+
+        key = hmac.new(self.cache_key, "\0".join((username, password, hashed_password)).encode(), hashlib.sha256).digest()
+        expires_at = self.verified.get(key)
+        if expires_at is not None:
+            if expires_at > time.monotonic():
+                self.cache_hits += 1
+                self.verified.move_to_end(key)
+                return True
+            del self.verified[key]
+
+        valid = await self._run(self.context.verify, password, hashed_password)
+        if valid:
+            self.verified[key] = time.monotonic() + self.cache_ttl
+            while len(self.verified) > self.cache_max_entries:
+                self.verified.popitem(last=False)
+        return valid
+
+    def clear(self):
+        self.verified.clear()
+
+    def stop(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "avg_wait_ms": round(self.total_wait / self.completed * 1000, 3) if self.completed else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+            "cache_entries": len(self.verified),
+            "cache_hits": self.cache_hits,
+        }
+
+
+password_hasher = PasswordHasher(
+    max_concurrency=settings.PASSWORD_HASH_CONCURRENCY,
+    cache_ttl=settings.PASSWORD_CACHE_TTL,
+)
@@ -1,24 +1,152 @@
-from datetime import datetime, timedelta
-from fastapi import HTTPException
+import json
+import math
+import time
+from abc import ABC, abstractmethod
+from typing import NamedTuple, Optional
+from app.core.config import settings
 
-request_counts = {}
 
-MAX_REQUESTS = 20
-TIME_WINDOW = 60
+class RateLimit(NamedTuple):
+    """``requests`` per ``window`` seconds, counted per client in the bucket called ``name``."""
+    name: str
+    requests: int
+    window: int
 
 
-def rate_limit(user_ip: str):
-    current_time = datetime.now()
+class RateLimitBackend(ABC):
+    """Counter storage for the sliding-window rate limiter.
 
-    if user_ip in request_counts:
-        request_counts[user_ip] = [
-            timestamp for timestamp in request_counts[user_ip] if
-            current_time - timestamp < timedelta(seconds=TIME_WINDOW)
-        ]
-        if len(request_counts[user_ip]) >= MAX_REQUESTS:
-            raise HTTPException(
-                status_code=429,
-                detail="Too many requests. Please try again later."
-            )
+    ``hit`` records a request for ``key`` unless it would exceed ``limit`` and returns
+    ``(allowed, retry_after_seconds)``. The count is a sliding-window approximation: the
+    previous fixed window's count weighted by how much of it still overlaps, plus the
+    current window's count, so each check is O(1) in time and memory.
+    """
 
-    request_counts.setdefault(user_ip, []).append(current_time)
+    @abstractmethod
+    async def hit(self, key: str, limit: RateLimit) -> tuple[bool, float]:
+        ...
+
+
+def sliding_window(previous: int, current: int, elapsed: float, limit: RateLimit) -> tuple[bool, float]:
+    weight = 1 - elapsed / limit.window
+    if previous * weight + current < limit.requests:
+        return True, 0.0
+    if current >= limit.requests or previous == 0:
+        return False, limit.window - elapsed
+    # Wait until enough of the previous window has slid out.
+    return False, (1 - (limit.requests - current) / previous) * limit.window - elapsed
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process counters on the monotonic clock, with idle keys swept every ``sweep_interval``."""
+
+    def __init__(self, sweep_interval: float = 60, clock=time.monotonic):
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self.counters = {}
+        self.next_sweep = clock() + sweep_interval
+
+    async def hit(self, key: str, limit: RateLimit) -> tuple[bool, float]:
+        now = self.clock()
+        if now >= self.next_sweep:
+            self.sweep(now)
+
+        index, elapsed = divmod(now, limit.window)
+        counter = self.counters.get(key)
+        if counter is None or counter[0] < index - 1:
+            counter = self.counters[key] = [index, 0, 0, limit.window]
+        elif counter[0] == index - 1:
+            counter[:3] = [index, counter[2], 0]
+
+        allowed, retry_after = sliding_window(counter[1], counter[2], elapsed, limit)
+        if allowed:
+            counter[2] += 1
+        return allowed, retry_after
+
+    def sweep(self, now: float):
+        # A key untouched for two windows has nothing left to slide.
+        self.counters = {
+            key: counter for key, counter in self.counters.items()
+            if counter[0] >= now // counter[3] - 1
+        }
+        self.next_sweep = now + self.sweep_interval
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Counters shared by every worker, in any server speaking the Redis protocol.
+
+    Windows are aligned on wall-clock time because processes don't share a monotonic clock.
+    Each window is a key that expires on its own, so idle clients need no sweeping.
+    """
+
+    def __init__(self, client, prefix: str = "bms:ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def hit(self, key: str, limit: RateLimit) -> tuple[bool, float]:
+        index, elapsed = divmod(time.time(), limit.window)
+        current_key = f"{self.prefix}{key}:{int(index)}"
+
+        pipe = self.client.pipeline()
+        pipe.incr(current_key)
+        pipe.expire(current_key, limit.window * 2)
+        pipe.get(f"{self.prefix}{key}:{int(index) - 1}")
+        current, _, previous = await pipe.execute()
+
+        allowed, retry_after = sliding_window(int(previous or 0), current - 1, elapsed, limit)
+        if not allowed:
+            await self.client.decr(current_key)
+        return allowed, retry_after
+
+
+def create_rate_limit_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis requires the 'redis' package") from e
+        return RedisRateLimitBackend(redis.from_url(settings.REDIS_URL))
+    return MemoryRateLimitBackend()
+
+
+class RateLimitMiddleware:
+    """Apply the first matching ``(method, path prefix, RateLimit)`` rule to each HTTP request.
+
+    ``method`` may be ``None`` to match any method. Requests matching no rule aren't limited.
+    """
+
+    def __init__(self, app, backend: RateLimitBackend, rules: list[tuple[Optional[str], str, RateLimit]]):
+        self.app = app
+        self.backend = backend
+        self.rules = rules
+
+    def match(self, method: str, path: str) -> Optional[RateLimit]:
+        for rule_method, prefix, limit in self.rules:
+            if (rule_method is None or rule_method == method) and path.startswith(prefix):
+                return limit
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        limit = self.match(scope["method"], scope["path"])
+        if limit is not None:
+            client = scope.get("client")
+            user_ip = client[0] if client else "unknown"
+            allowed, retry_after = await self.backend.hit(f"{limit.name}:{user_ip}", limit)
+            if not allowed:
+                body = json.dumps({"detail": "Too many requests. Please try again later."}).encode()
+                await send({
+                    "type": "http.response.start",
+                    "status": 429,
+                    "headers": [
+                        (b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode()),
+                        (b"retry-after", str(max(math.ceil(retry_after), 1)).encode()),
+                    ],
+                })
+                await send({"type": "http.response.body", "body": body})
+                return
+
+        await self.app(scope, receive, send)
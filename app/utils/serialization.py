@@ -0,0 +1,28 @@
+import json
+from typing import Any
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+if orjson is not None:
+    def dumps(value: Any) -> bytes:
+        return orjson.dumps(value)
+else:
+    def dumps(value: Any) -> bytes:
+        # The same compact UTF-8 output as orjson and Pydantic's dump_json.
+        return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response for content already in its response shape, encoded with ``dumps``.
+
+    Nothing is validated against the route's ``response_model``; callers pass plain dicts
+    and lists built from trusted rows.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
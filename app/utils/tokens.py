@@ -0,0 +1,151 @@
+import hashlib
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Optional
+import jwt as pyjwt
+from jose import jwt as jose_jwt, JWTError
+from app.core.config import settings
+
+
+class TokenError(Exception):
+    """The token is malformed, wrongly signed, expired or revoked."""
+
+
+class JWTBackend(ABC):
+    """Sign and verify JWTs; ``decode`` raises ``TokenError`` for any invalid token."""
+
+    def __init__(self, secret_key: str, algorithm: str):
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+
+    @abstractmethod
+    def encode(self, claims: dict) -> str:
+        ...
+
+    @abstractmethod
+    def decode(self, token: str) -> dict:
+        ...
+
+
+class JoseBackend(JWTBackend):
+    def encode(self, claims: dict) -> str:
+        return jose_jwt.encode(claims, self.secret_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        try:
+            return jose_jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except JWTError as e:
+            raise TokenError(str(e)) from e
+
+
+class PyJWTBackend(JWTBackend):
+    def encode(self, claims: dict) -> str:
+        return pyjwt.encode(claims, self.secret_key, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        try:
+            return pyjwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except pyjwt.InvalidTokenError as e:
+            raise TokenError(str(e)) from e
+
+
+JWT_BACKENDS = {"jose": JoseBackend, "pyjwt": PyJWTBackend}
+
+
+def create_jwt_backend(name: str = None) -> JWTBackend:
+    name = name or settings.JWT_BACKEND
+    if name not in JWT_BACKENDS:
+        raise RuntimeError(f"Unknown JWT_BACKEND {name!r}; expected one of {', '.join(JWT_BACKENDS)}")
+    return JWT_BACKENDS[name](settings.SECRET_KEY, settings.JWT_ALGORITHM)
+
+
+class TokenVerifier:
+    """Verify JWTs through ``backend``, remembering the claims of tokens already verified.
+
+    Entries are keyed by the SHA-256 of the token and kept until its ``exp`` claim or
+    ``cache_ttl`` seconds, whichever comes first; only the ``max_entries`` most recently used
+    are kept. ``revoke`` rejects a token before it expires, and every function registered
+    with ``add_revocation_check`` is asked about each token, cached or not.
+    """
+
+    def __init__(self, backend: JWTBackend, cache_ttl: int, max_entries: int):
+        self.backend = backend
+        self.cache_ttl = cache_ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.revoked = {}
+        self.revocation_checks = []
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def encode(self, claims: dict) -> str:
+        return self.backend.encode(claims)
+
+    def verify(self, token: str) -> dict:
+        key = self.digest(token)
+        now = time.time()
+        if key in self.revoked:
+            raise TokenError("Token has been revoked")
+
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] > now:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            claims = entry[1]
+        else:
+            self.misses += 1
+            self.entries.pop(key, None)
+            claims = self.backend.decode(token)
+            if self.cache_ttl > 0:
+                expires_at = min(claims.get("exp", float("inf")), now + self.cache_ttl)
+                self.entries[key] = (expires_at, claims)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+
+        for is_revoked in self.revocation_checks:
+            if is_revoked(claims):
+                raise TokenError("Token has been revoked")
+        return dict(claims)
+
+    def revoke(self, token: str, expires_at: Optional[float] = None):
+        """Reject ``token`` until ``expires_at`` (its ``exp`` claim when omitted)."""
+        key = self.digest(token)
+        self.entries.pop(key, None)
+        if expires_at is None:
+            try:
+                expires_at = self.backend.decode(token).get("exp", float("inf"))
+            except TokenError:
+                return
+        now = time.time()
+        self.revoked = {key: until for key, until in self.revoked.items() if until > now}
+        self.revoked[key] = expires_at
+
+    def add_revocation_check(self, is_revoked: Callable[[dict], bool]):
+        self.revocation_checks.append(is_revoked)
+        return is_revoked
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "entries": len(self.entries),
+            "revoked": len(self.revoked),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+token_verifier = TokenVerifier(
+    create_jwt_backend(),
+    cache_ttl=settings.TOKEN_CACHE_TTL,
+    max_entries=settings.TOKEN_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,232 @@
+import codecs
+import csv
+import json
+import re
+import tempfile
+from collections import deque
+from typing import AsyncIterator
+from fastapi import HTTPException, UploadFile
+
+READ_CHUNK_SIZE = 64 * 1024
+BATCH_SIZE = 5000
+MAX_JSON_VALUE_SIZE = 16 * 1024 * 1024
+
+_whitespace = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+async def iter_text_chunks(file: UploadFile, chunk_size: int = READ_CHUNK_SIZE, encoding: str = "utf-8"):
+    decoder = codecs.getincrementaldecoder(encoding)()
+    while chunk := await file.read(chunk_size):
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+class _NeedMoreText(Exception):
+    """The buffered lines ended inside a CSV record."""
+
+
+class _CSVLines:
+    """Line iterator feeding one ``csv`` reader across the chunks of an upload.
+
+    The csv module tracks quoting itself, so a ``"`` inside an unquoted field is just data.
+    When the buffered lines run out in the middle of a record, the lines read for it are put
+    back and ``_NeedMoreText`` is raised; the record is parsed again once more text arrives.
+    """
+
+    def __init__(self):
+        self.lines = deque()
+        self.taken = []
+        self.pending = ""
+        self.final = False
+
+    def feed(self, text: str):
+        lines = (self.pending + text).split("\n")
+        self.pending = lines.pop()
+        self.lines.extend(line + "\n" for line in lines)
+
+    def finish(self):
+        if self.pending:
+            self.lines.append(self.pending)
+            self.pending = ""
+        self.final = True
+
+    def commit(self):
+        self.taken.clear()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            if self.final:
+                raise StopIteration
+            self.lines.extendleft(reversed(self.taken))
+            self.taken.clear()
+            raise _NeedMoreText
+        line = self.lines.popleft()
+        self.taken.append(line)
+        return line
+
+
+async def iter_csv_batches(file: UploadFile, batch_size: int = BATCH_SIZE):
+    lines = _CSVLines()
+    reader = csv.DictReader(lines)
+    batch = []
+
+    def read_records():
+        try:
+            # The header is read on first access; keep it apart from the first record.
+            reader.fieldnames
+        except _NeedMoreText:
+            return
+        lines.commit()
+        while True:
+            try:
+                row = next(reader)
+            except (_NeedMoreText, StopIteration):
+                return
+            lines.commit()
+            batch.append(row)
+
+    async for text in iter_text_chunks(file):
+        lines.feed(text)
+        read_records()
+
+        while len(batch) >= batch_size:
+            yield batch[:batch_size]
+            del batch[:batch_size]
+
+    lines.finish()
+    read_records()
+    while batch:
+        yield batch[:batch_size]
+        del batch[:batch_size]
+
+
+class _JsonStream:
+    def __init__(self, chunks: AsyncIterator[str]):
+        self.chunks = chunks
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    async def _fill(self) -> bool:
+        if self.eof:
+            return False
+        try:
+            text = await anext(self.chunks)
+        except StopAsyncIteration:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + text
+        self.pos = 0
+        return True
+
+    def error(self, message: str):
+        return json.JSONDecodeError(message, self.buffer, self.pos)
+
+    async def peek(self) -> str:
+        while True:
+            self.pos = _whitespace.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not await self._fill():
+                return ""
+
+    async def take(self, expected: str) -> str:
+        char = await self.peek()
+        if not char or char not in expected:
+            raise self.error(f"Expecting one of {expected!r}")
+        self.pos += 1
+        return char
+
+    async def decode(self):
+        await self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if len(self.buffer) - self.pos > MAX_JSON_VALUE_SIZE or not await self._fill():
+                    raise
+                continue
+            # A value ending at the buffer edge may continue in the next chunk (e.g. a number).
+            if end == len(self.buffer) and await self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+async def iter_json_authors(file: UploadFile):
+    stream = _JsonStream(iter_text_chunks(file))
+    found = False
+
+    await stream.take("{")
+    if await stream.peek() == "}":
+        stream.pos += 1
+    else:
+        while True:
+            key = await stream.decode()
+            if not isinstance(key, str):
+                raise stream.error("Expecting property name")
+            await stream.take(":")
+
+            if key == "authors" and not found and await stream.peek() == "[":
+                found = True
+                stream.pos += 1
+                if await stream.peek() == "]":
+                    stream.pos += 1
+                else:
+                    while True:
+                        yield await stream.decode()
+                        if await stream.take(",]") == "]":
+                            break
+            else:
+                await stream.decode()
+
+            if await stream.take(",}") == "}":
+                break
+
+    if await stream.peek():
+        raise stream.error("Extra data")
+    if not found:
+        raise HTTPException(status_code=400, detail="Invalid JSON format. 'authors' field is required.")
+
+
+async def iter_json_batches(file: UploadFile, batch_size: int = BATCH_SIZE):
+    batch = []
+    async for author_data in iter_json_authors(file):
+        author_name = author_data.get("name")
+        if not author_name:
+            continue
+
+        batch.append({"author_name": author_name})
+        for book_data in author_data.get("books", []):
+            if not book_data.get("title"):
+                continue
+            batch.append({
+                "author_name": author_name,
+                "title": book_data["title"],
+                "genre": book_data.get("genre"),
+                "published_year": book_data.get("published_year"),
+            })
+
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+async def spool_upload(file: UploadFile, max_size: int = 1024 * 1024) -> UploadFile:
+    # FastAPI closes request uploads once the endpoint returns, so background work needs its own copy.
+    upload = UploadFile(file=tempfile.SpooledTemporaryFile(max_size=max_size), filename=file.filename)
+    while chunk := await file.read(READ_CHUNK_SIZE):
+        await upload.write(chunk)
+    await upload.seek(0)
+    return upload
@@ -0,0 +1,110 @@
+"""Compare query plans of the book/author filters with and without the search indexes.
+
+    python -m benchmarks.explain_book_filters --books 200000
+
+Synthetic rows are seeded, both plans are captured and everything is rolled back at the end,
+so the target database is left untouched. Dropping the indexes inside the transaction takes
+an exclusive lock on ``books`` and ``authors`` while it runs; point it at a dev database.
+"""
+import argparse
+import asyncio
+import json
+import os
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+# The title index backs a unique constraint and isn't dropped; it serves the "dedupe key"
+# query in both plans.
+INDEXES = [
+    "ix_books_author_id",
+    "ix_books_published_year",
+    "ix_books_genre",
+    "ix_books_title_trgm",
+    "ix_books_genre_trgm",
+    "ix_authors_name_trgm",
+]
+
+QUERIES = {
+    "title ilike": "SELECT id FROM books WHERE title ILIKE '%title 4242 %'",
+    "genre ilike": "SELECT id FROM books WHERE genre ILIKE '%satire%'",
+    "author name ilike": "SELECT id FROM authors WHERE name ILIKE '%author 777%'",
+    "books of author": "SELECT id FROM books WHERE author_id = (SELECT max(id) FROM authors)",
+    "year range": "SELECT id FROM books WHERE published_year BETWEEN 1801 AND 1802",
+    "dedupe key": "SELECT id FROM books WHERE title = 'Bench Title 4242' AND author_id = 1",
+}
+
+SEED_SQL = """
+WITH new_authors AS (
+    INSERT INTO authors (name)
+    SELECT 'Bench Author ' || g FROM generate_series(1, :authors) AS g
+    RETURNING id
+), author_ids AS (
+    SELECT array_agg(id) AS ids FROM new_authors
+)
+INSERT INTO books (title, genre, published_year, author_id)
+SELECT 'Bench Title ' || g,
+       (ARRAY['Fiction', 'Non-Fiction', 'Adventure', 'Science', 'History', 'Biography', 'Fantasy',
+              'Mystery', 'Dystopian', 'Romance', 'Satire', 'Political Satire', 'Classic'])[1 + g % 13],
+       1800 + g % 226,
+       ids[1 + g % :authors]
+FROM generate_series(1, :books) AS g, author_ids
+"""
+
+
+def summarize(plan: dict) -> str:
+    nodes = []
+
+    def walk(node):
+        relation = node.get("Index Name") or node.get("Relation Name")
+        nodes.append(f"{node['Node Type']} ({relation})" if relation else node["Node Type"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan["Plan"])
+    scans = [node for node in nodes if "Scan" in node]
+    return f"{plan['Execution Time']:9.2f} ms  {', '.join(scans)}"
+
+
+async def explain_all(conn) -> dict:
+    plans = {}
+    for name, sql in QUERIES.items():
+        result = await conn.execute(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}"))
+        plan = result.scalar()
+        plans[name] = summarize((json.loads(plan) if isinstance(plan, str) else plan)[0])
+    return plans
+
+
+async def main(books: int, authors: int):
+    load_dotenv()
+    engine = create_async_engine(os.getenv("DATABASE_URL"))
+
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            if books:
+                await conn.execute(text(SEED_SQL), {"books": books, "authors": authors})
+            await conn.execute(text("ANALYZE books"))
+            await conn.execute(text("ANALYZE authors"))
+
+            with_indexes = await explain_all(conn)
+            await conn.execute(text(f"DROP INDEX IF EXISTS {', '.join(INDEXES)}"))
+            without_indexes = await explain_all(conn)
+        finally:
+            await transaction.rollback()
+
+    await engine.dispose()
+
+    for name in QUERIES:
+        print(name)
+        print(f"  without indexes: {without_indexes[name]}")
+        print(f"  with indexes:    {with_indexes[name]}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=200_000, help="synthetic books to seed (0 to skip)")
+    parser.add_argument("--authors", type=int, default=5_000, help="synthetic authors to seed")
+    args = parser.parse_args()
+    asyncio.run(main(args.books, args.authors))
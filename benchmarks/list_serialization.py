@@ -0,0 +1,81 @@
+"""Measure book listing throughput with and without the row serialization fast path.
+
+    python -m benchmarks.list_serialization --books 100000 --limit 1000
+
+Synthetic books are seeded inside a transaction that is rolled back at the end. Each case
+fetches ``--limit`` books and encodes the response body. "models" is the previous path: ORM
+objects, ``BookSchema.from_orm`` per row, then validation against ``response_model`` and
+Pydantic's JSON dump. "rows" builds dicts straight from result rows and encodes them with
+``dumps`` (orjson when installed).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from dotenv import load_dotenv
+from pydantic import TypeAdapter
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.crud.books import get_books_list, select_books_with_authors
+from app.schemas.books import BookSchema
+from app.utils.serialization import dumps, orjson
+from benchmarks.explain_book_filters import SEED_SQL
+
+book_list_adapter = TypeAdapter(list[BookSchema])
+
+
+async def models_body(db: AsyncSession, limit: int, skip: int) -> bytes:
+    result = await db.execute(select_books_with_authors().offset(skip).limit(limit))
+    books = [BookSchema.from_orm(book) for book in result.scalars().all()]
+    # FastAPI validates the returned models against response_model before dumping them.
+    return book_list_adapter.dump_json(book_list_adapter.validate_python(books))
+
+
+async def rows_body(db: AsyncSession, limit: int, skip: int) -> bytes:
+    return dumps(await get_books_list(db, skip=skip, limit=limit))
+
+
+async def time_case(build, db: AsyncSession, limit: int, repeat: int) -> str:
+    timings = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        await build(db, limit, i * limit)
+        timings.append(time.perf_counter() - started)
+        db.expunge_all()
+    median = statistics.median(timings)
+    return f"median {median * 1000:8.2f} ms  {limit / median:10.0f} books/s"
+
+
+async def main(books: int, authors: int, limit: int, repeat: int):
+    load_dotenv()
+    engine = create_async_engine(os.getenv("DATABASE_URL"))
+
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        try:
+            await conn.execute(text(SEED_SQL), {"books": books, "authors": min(authors, books)})
+            await conn.execute(text("ANALYZE books"))
+            await conn.execute(text("ANALYZE authors"))
+
+            db = AsyncSession(bind=conn)
+            print(f"limit={limit}, encoder: {'orjson' if orjson is not None else 'json'}")
+            print(f"  models: {await time_case(models_body, db, limit, repeat)}")
+            print(f"  rows:   {await time_case(rows_body, db, limit, repeat)}")
+            await db.close()
+        finally:
+            await transaction.rollback()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--books", type=int, default=100_000, help="synthetic books to seed")
+    parser.add_argument("--authors", type=int, default=5_000, help="synthetic authors to seed")
+    parser.add_argument("--limit", type=int, default=1000, help="books per listing")
+    parser.add_argument("--repeat", type=int, default=20, help="timed listings per case")
+    args = parser.parse_args()
+    asyncio.run(main(args.books, args.authors, args.limit, args.repeat))
@@ -0,0 +1,83 @@
+"""Measure recommendation latency against catalogues of growing size.
+
+    python -m benchmarks.recommend_latency --sizes 10000 1000000 10000000
+
+For every size, synthetic books are seeded inside a transaction, the recommendation query is
+timed with and without filters, and the transaction is rolled back. The previous
+load-everything-and-``random.choice`` approach is timed too, up to ``--legacy-max`` books,
+because past that it mostly measures how much memory the worker has.
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.crud.books import build_book_filters, select_books_with_authors
+from app.crud.recommend import get_random_book
+from benchmarks.explain_book_filters import SEED_SQL
+
+CASES = {
+    "unfiltered": {},
+    "genre": {"genre": "Satire"},
+    "author name": {"author_name": "Bench Author 77"},
+}
+
+
+async def legacy_random_book(db: AsyncSession, genre=None, author_name=None):
+    filters = build_book_filters(genre=genre, author_name=author_name)
+    result = await db.execute(select_books_with_authors().filter(*filters))
+    return random.choice(result.scalars().all())
+
+
+async def time_calls(func, db: AsyncSession, repeat: int, **filters) -> str:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func(db, **filters)
+        timings.append((time.perf_counter() - started) * 1000)
+        db.expunge_all()
+    return f"median {statistics.median(timings):9.2f} ms  max {max(timings):9.2f} ms"
+
+
+async def main(sizes: list[int], authors: int, repeat: int, legacy_max: int):
+    load_dotenv()
+    engine = create_async_engine(os.getenv("DATABASE_URL"))
+
+    for size in sizes:
+        async with engine.connect() as conn:
+            transaction = await conn.begin()
+            try:
+                await conn.execute(text(SEED_SQL), {"books": size, "authors": min(authors, size)})
+                await conn.execute(text("ANALYZE books"))
+                await conn.execute(text("ANALYZE authors"))
+
+                db = AsyncSession(bind=conn)
+                print(f"{size} books")
+                for name, filters in CASES.items():
+                    print(f"  {name}")
+                    print(f"    count + offset: {await time_calls(get_random_book, db, repeat, **filters)}")
+                    if size <= legacy_max:
+                        print(f"    load all:       {await time_calls(legacy_random_book, db, repeat, **filters)}")
+                await db.close()
+            finally:
+                await transaction.rollback()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000, 10_000_000],
+                        help="catalogue sizes to seed")
+    parser.add_argument("--authors", type=int, default=5_000, help="synthetic authors to seed")
+    parser.add_argument("--repeat", type=int, default=20, help="timed calls per case")
+    parser.add_argument("--legacy-max", type=int, default=1_000_000,
+                        help="largest catalogue to time the load-everything approach on")
+    args = parser.parse_args()
+    asyncio.run(main(args.sizes, args.authors, args.repeat, args.legacy_max))